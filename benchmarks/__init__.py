@@ -0,0 +1,8 @@
+"""Benchmarks for our systems and for whole frames.
+
+Run them from the top of the repo (the assets are loaded with relative paths):
+
+    python -m benchmarks                          # just print the numbers
+    python -m benchmarks --save baseline.json     # remember them
+    python -m benchmarks --compare baseline.json  # fail if we got slower
+"""
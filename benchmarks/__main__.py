@@ -0,0 +1,51 @@
+import argparse
+import json
+import sys
+
+from benchmarks.cases import CASES, make_framework
+from benchmarks.harness import measure, compare
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="Time our systems and whole frames")
+    parser.add_argument("--iterations", type=int, default=500)
+    parser.add_argument("--save", metavar="JSON", help="write the results as a new baseline")
+    parser.add_argument("--compare", metavar="JSON", help="fail if we're slower than this baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="how much slower than the baseline is still fine (0.25 = 25%%)")
+    parser.add_argument("--floor", type=float, default=0.05,
+                        help="ignore anything that got less than this many ms slower")
+    parser.add_argument("cases", nargs="*", help="only run these cases")
+    args = parser.parse_args()
+
+    results = {}
+    print("{0:32} {1:>9} {2:>9} {3:>9} {4:>12} {5:>8}".format("case", "p50 ms", "p95 ms", "p99 ms", "alloc B", "blocks"))
+    for name, case in CASES.items():
+        if args.cases and name not in args.cases:
+            continue
+
+        # Every case gets a fresh game so they can't affect each other
+        result = measure(case(make_framework()), args.iterations)
+        results[name] = result
+        print("{0:32} {1:9.3f} {2:9.3f} {3:9.3f} {4:12.0f} {5:8.1f}".format(
+            name, result["p50"], result["p95"], result["p99"], result["alloc_bytes"], result["alloc_blocks"]))
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+
+        regressions = compare(results, baseline, args.tolerance, args.floor)
+        if regressions:
+            print("\nREGRESSIONS against {0}:".format(args.compare))
+            for regression in regressions:
+                print("  " + regression)
+            sys.exit(1)
+        print("\nNo regressions against {0}".format(args.compare))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+import os
+
+# Everything is drawn to an offscreen surface
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import pygame
+
+from lib.assets import assets
+from lib.clock import SimulatedClock
+from lib.framework import Framework
+from lib.menu import MenuState, MenuStates
+from game.game import GameState
+
+
+def make_framework():
+    """A framework drawing offscreen with a simulated clock, so every run sees the same game"""
+    framework = Framework(seed=0, clock=SimulatedClock())
+    framework.enter_game("Benchmark", "Boy")
+    # Lay the game out before we time anything
+    framework.run(1)
+    return framework
+
+
+def collision(framework):
+    game = framework.state
+    system = game.scheduler.get("CollisionSystem")
+    return lambda: system.update(game, 1 / 60, [])
+
+
+def user_input(framework):
+    game = framework.state
+    system = game.scheduler.get("UserInputSystem")
+    return lambda: system.update(game, 1 / 60, [])
+
+
+def render(framework):
+    game = framework.state
+    system = game.render_scheduler.get("RenderSystem")
+    return lambda: system.update(game, 1 / 60, [])
+
+
+def get_image_warm(framework):
+    game = framework.state
+    system = game.render_scheduler.get("RenderSystem")
+    trash = game.trash.sprite
+    return lambda: system.get_image(trash, 0)
+
+
+def get_image_cold(framework):
+    game = framework.state
+    system = game.render_scheduler.get("RenderSystem")
+    trash = game.trash.sprite
+
+    def run():
+        # Forget everything, atlas included, so the sheet gets decoded, scaled and sliced again
+        assets.clear()
+        assets.atlas = None
+        system.get_image(trash, 0)
+    return run
+
+
+def menu_render(framework):
+    menu = MenuState(framework)
+    item = menu.get_screen_data(MenuStates.MAIN_MENU)
+    return item.render
+
+
+def aspect_scale(framework):
+    menu = MenuState(framework)
+    item = menu.get_screen_data(MenuStates.MAIN_MENU)
+    width, height = framework.screen.get_size()
+    logo = assets.image(item.logo_path)
+    return lambda: item.aspect_scale(logo, width // 2, height)
+
+
+def frame(framework):
+    def run():
+        # Rounds end, keep timing game frames rather than the leaderboard
+        if not isinstance(framework.state, GameState):
+            framework.enter_game("Benchmark", "Boy")
+        framework.run(1)
+    return run
+
+
+# name -> function making what we time
+CASES = {
+    "CollisionSystem.update": collision,
+    "UserInputSystem.update": user_input,
+    "RenderSystem.update": render,
+    "RenderSystem.get_image (warm)": get_image_warm,
+    "RenderSystem.get_image (cold)": get_image_cold,
+    "MenuItem.render": menu_render,
+    "MenuItem.aspect_scale": aspect_scale,
+    "Framework frame": frame,
+}
@@ -0,0 +1,69 @@
+import gc
+import sys
+import time
+import tracemalloc
+
+from lib.trace import percentile
+
+
+def measure(fn, iterations=500, warmup=20):
+    """Times fn once per iteration, then runs it again to count what it allocates.
+
+    Returns milliseconds for p50/p95/p99/mean, the peak bytes allocated while
+    fn runs and how many memory blocks each call leaves behind."""
+    for _ in range(warmup):
+        fn()
+
+    # The collector kicking in at random would make the percentiles noisy
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        samples = []
+        for _ in range(iterations):
+            start = time.perf_counter()
+            fn()
+            samples.append((time.perf_counter() - start) * 1000)
+
+        # tracemalloc slows everything down, so allocations get their own pass
+        alloc_iterations = max(1, iterations // 10)
+        tracemalloc.start()
+        peak = 0
+        blocks_before = sys.getallocatedblocks()
+        for _ in range(alloc_iterations):
+            tracemalloc.reset_peak()
+            current = tracemalloc.get_traced_memory()[0]
+            fn()
+            peak += tracemalloc.get_traced_memory()[1] - current
+        blocks_after = sys.getallocatedblocks()
+        tracemalloc.stop()
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+
+    return {
+        "p50": percentile(samples, 50),
+        "p95": percentile(samples, 95),
+        "p99": percentile(samples, 99),
+        "mean": sum(samples) / len(samples),
+        "alloc_bytes": peak / alloc_iterations,
+        "alloc_blocks": (blocks_after - blocks_before) / alloc_iterations,
+    }
+
+
+def compare(results, baseline, tolerance, floor=0.05):
+    """Returns a message for every case that got more than tolerance slower than the baseline.
+
+    Changes smaller than floor ms don't count, at a few microseconds a case's
+    timings are mostly noise and would flag a regression run to run."""
+    regressions = []
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+
+        for key in ("p50", "p95"):
+            old = baseline[name][key]
+            new = result[key]
+            if new > old * (1 + tolerance) and new - old >= floor:
+                regressions.append("{0} {1}: {2:.3f} ms -> {3:.3f} ms ({4:+.0%})".format(
+                    name, key, old, new, new / old - 1))
+    return regressions
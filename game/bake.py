@@ -0,0 +1,62 @@
+"""Bakes our sprites into the atlas, so starting up doesn't have to decode and scale PNGs.
+
+The framework does this by itself on the first run (or when an image changed),
+but it can be done ahead of time too:
+
+    python -m game.bake
+"""
+from lib.assets import AssetManager
+from lib.atlas import SpriteAtlas
+
+ATLAS_DIRECTORY = 'cache'
+
+BACKGROUND = 'assets/images/Background.fw.png'
+BINS = 'assets/images/BinSprite.fw.png'
+TRASH = 'assets/images/TrashSprite.fw.png'
+LOGO = 'assets/images/logo.fw.png'
+
+# Window sizes we bake the background, bins and logo for
+RESOLUTIONS = [(1360, 765), (1920, 1080), (1366, 768), (1280, 720), (1024, 768)]
+
+
+def make_atlas():
+    return SpriteAtlas(ATLAS_DIRECTORY, [BACKGROUND, BINS, TRASH, LOGO])
+
+
+def bake(atlas, resolutions=RESOLUTIONS):
+    """Scales and slices everything the same way the game does and saves it to the atlas"""
+    # Only needed when the atlas is stale, so don't slow down every start up with them
+    from game.game import GameState
+    from lib.menu import MenuItem
+
+    # A manager of our own, so everything gets made (and recorded) from scratch
+    baker = AssetManager(budget=float("inf"))
+    baker.recording = []
+
+    sizes = {path: baker.image(path).get_size() for path in atlas.sources}
+
+    baker.tiles(TRASH, 60, 2)
+    for dimensions in resolutions:
+        baker.scaled(BACKGROUND, dimensions, alpha=False)
+
+        tile_size = GameState.bin_tile_size(dimensions, sizes[BACKGROUND], sizes[BINS])
+        baker.tiles(BINS, tile_size, 1, (tile_size[0] * 6, tile_size[1]))
+
+        logo_size = MenuItem.aspect_size(sizes[LOGO], int(dimensions[0] / 2), dimensions[1])
+        baker.scaled(LOGO, logo_size, smooth=True)
+
+    atlas.save(baker.recording, sizes)
+
+
+if __name__ == "__main__":
+    import os
+    import pygame
+
+    # Converting surfaces needs a display, but not a window
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    pygame.display.init()
+    pygame.display.set_mode((1, 1))
+
+    atlas = make_atlas()
+    bake(atlas)
+    print("Baked {0} into {1}".format(", ".join(atlas.sources), atlas.directory))
@@ -0,0 +1,53 @@
+class Position:
+    """Where an entity's top-left corner is"""
+    __slots__ = ("x", "y")
+
+    def __init__(self, x=0, y=0):
+        self.x = x
+        self.y = y
+
+    def get(self):
+        return (self.x, self.y)
+
+
+class Sprite:
+    """Which tile of a SpriteSheet an entity looks like.
+
+    Static sprites only change when the layout does, so RenderSystem draws
+    them once into its static layer instead of every frame."""
+    __slots__ = ("sheet", "index", "static")
+
+    def __init__(self, sheet, index=0, static=False):
+        self.sheet = sheet
+        self.index = index
+        self.static = static
+
+
+class Shape:
+    """Plain rectangles of one colour, e.g. the pause button's bars"""
+    __slots__ = ("rects", "colour", "static")
+
+    def __init__(self, rects, colour=(0, 0, 0), static=True):
+        self.rects = rects
+        self.colour = colour
+        self.static = static
+
+
+class Collider:
+    """A bin trash can land in, kind is the trash it takes (trash index // 3)"""
+    __slots__ = ("kind",)
+
+    def __init__(self, kind):
+        self.kind = kind
+
+
+class Button:
+    """Somewhere on screen that can be clicked"""
+    __slots__ = ("rect", "clicked")
+
+    def __init__(self, rect):
+        self.rect = rect
+        self.clicked = False
+
+    def contains(self, pos):
+        return self.rect[0] < pos[0] < self.rect[0] + self.rect[2] and self.rect[1] < pos[1] < self.rect[1] + self.rect[3]
@@ -1,24 +1,35 @@
+import math
 import pygame
 
 from game.systems.render import RenderSystem
 from game.systems.userinput import UserInputSystem
 from game.systems.collision import CollisionSystem
+from game.systems.hud import HudSystem
 
+from game.trashstore import TrashStore
+from game.components import Position, Sprite, Shape, Collider, Button
+
+from lib.assets import assets
+from lib.entity import Registry
 from lib.spritesheet import SpriteSheet
+from lib.scheduler import Scheduler
 
 
 class GameState:
     """Our core code.
     
     Our game is made up of entities, with individual properties and systems:
-    - Items have basic properties in a dictionary:
-      * Trash: {"sprite": SpriteSheet(), "pos": [[0, 2], [2, 3]]}
+    - Entities are made of components (game/components.py), kept in a Registry:
+      * Bins: Position, Sprite and Collider
+      * Pause button: Button and Shape
+    - Trash lives in a TrashStore, as arrays so lots of it can fall at once
     - Systems update all of our entities to make things tick-over, e.g.:
       * CollisionSystem
       * RenderSystem
       * UserInputSystem
+    - The scheduler runs every system at its own rate, in dependency order.
+      Game logic runs at a fixed tick rate, drawing runs once per frame
     """
-    systems = []
 
     def __init__(self, framework, name, gender):
         """Creates a GameState to fit our framework, with some information about ourselves."""
@@ -33,58 +44,127 @@ class GameState:
         self.frames = 0
         self.paused = False
         self.over = False
-        self.remaining_time = 120
-        self.start_time = pygame.time.get_ticks()
+        self.remaining_time = framework.round_time
+        self.start_time = framework.clock.get_ticks()
 
-        self.items = {}
+        self.entities = Registry()
+        # Bumped whenever the background, bins or pause button change how they look
+        self.static_version = 0
         self.right = 0
         self.wrong = 0
         self.background = SpriteSheet("assets/images/Background.fw.png", self.framework.dimensions)
 
-        # Add all systems we want to run
-        self.systems.extend([
-            # TODO: To add a profile somehow to add to the leaderboard
-            #ProfileSystem(name, gender),
-            UserInputSystem(),
-            self.collisionSystem,
-            self.renderSystem,
-        ])
-
-        self.items["trash"] = {
-            "sprite": SpriteSheet("assets/images/TrashSprite.fw.png", 60, 2),
-            "index": 0,
-            "pos": [500, 50],
-            "offset": [0, 0],
-            "falling": True,
-        }
-
-        # There will be three bins
-        self.items["bins"] = {
-            "sprite": SpriteSheet("assets/images/BinSprite.fw.png", (144, 188)),
-            "index": [0, 2, 4],
-            "pos": [[144, 577], [603, 577], [1062, 577]],
-            "offset": [144, 188]
-        }
-
-        self.items["pause"] = {
-            "pos": [[self.framework.dimensions[0] - 50, 10, 10, 50], [self.framework.dimensions[0] - 25, 10, 10, 50]],
-            "rect": [self.framework.dimensions[0]-50, 10, 35, 50],
-            "clicked": False
-        }
+        # What HudSystem wants drawn, as (surface, pos)
+        self.hud = []
+
+        # How far we are between the last tick and the next one, for drawing
+        self.alpha = 1.0
+
+        # Add all systems we want to run every tick
+        self.scheduler = Scheduler()
+        # TODO: To add a profile somehow to add to the leaderboard
+        #self.scheduler.add(ProfileSystem(name, gender))
+        self.scheduler.add(UserInputSystem(framework.round_time))
+        self.scheduler.add(self.collisionSystem)
+
+        # And the ones that draw every frame
+        self.render_scheduler = Scheduler()
+        self.render_scheduler.add(HudSystem())
+        self.render_scheduler.add(self.renderSystem)
+
+        # Everything falling from the sky, there's more than one piece in rush mode
+        self.trash = TrashStore(SpriteSheet("assets/images/TrashSprite.fw.png", 60, 2))
+        self.trash.spawn(0, 500, 50)
+
+        # There will be three bins, all drawn from the same sheet, relayout puts them in place
+        self.bin_sheet = SpriteSheet("assets/images/BinSprite.fw.png", (144, 188))
+        self.bins = [
+            self.entities.create(Position(), Sprite(self.bin_sheet, kind * 2, static=True), Collider(kind),
+                                 name="bin{0}".format(kind))
+            for kind in range(3)
+        ]
+
+        self.pause_button = self.entities.create(Button([0, 0, 0, 0]), Shape([]), name="pause")
+
+        # Fit everything to the window, this happens again whenever it's resized
+        self.layout_dimensions = None
+        self.relayout(tuple(self.framework.dimensions))
+
+    @staticmethod
+    def bin_tile_size(dimensions, background_size, sheet_size):
+        """Make a new tile size using the formula bw' = bw * (BW' / BW), the sprite has 6 images"""
+        return (int(sheet_size[0] / 6 * (dimensions[0] / background_size[0])),
+                int(sheet_size[1] * (dimensions[1] / background_size[1])))
+
+    def relayout(self, dimensions):
+        """Moves the bins and pause button to fit the window. This is game logic (the bins
+        decide what trash hits), so it happens on ticks whether or not anything gets drawn"""
+        native_size = assets.image_size(self.background.path)
+        self.background.tile_size = dimensions
+
+        new_tile_size = self.bin_tile_size(dimensions, native_size, assets.image_size(self.bin_sheet.path))
+
+        # The whole sheet gets scaled to our new sizes (width = tw * 6 because the sprite has 6 images)
+        self.bin_sheet.tile_size = new_tile_size
+        self.bin_sheet.sheet_size = (new_tile_size[0] * 6, new_tile_size[1])
+
+        xs = [
+            new_tile_size[0],
+            new_tile_size[0] + (dimensions[0] - 3 * new_tile_size[0]) / 2,
+            dimensions[0] - 2 * new_tile_size[0]
+        ]
+        for entity, x in zip(self.bins, xs):
+            position = self.entities.get(entity, Position)
+            position.x, position.y = x, dimensions[1] - new_tile_size[1]
+
+        # Getting new pause button position
+        self.entities.get(self.pause_button, Shape).rects = [
+            [dimensions[0] - 50, 10, 10, 50],
+            [dimensions[0] - 25, 10, 10, 50]
+        ]
+        self.entities.get(self.pause_button, Button).rect = [dimensions[0] - 50, 10, 35, 50]
+
+        self.layout_dimensions = dimensions
+        self.static_version += 1
+
+    def set_bin_index(self, bin_number, index):
+        """Changes the image of a bin, e.g. to open it"""
+        sprite = self.entities.get(self.bins[bin_number], Sprite)
+        if sprite.index != index:
+            sprite.index = index
+            self.static_version += 1
 
     def update(self, dt: float, events):
-        """This code gets run 60fps. All of our game logic stems from updating
-        our systems on our entities."""
+        """This code gets run every tick (60 times a second unless the framework says otherwise).
+        All of our game logic stems from updating our systems on our entities."""
 
         # Update our systems
         if not self.over:
-            for system in self.systems:
-                system.update(self, dt, events)
+            if tuple(self.framework.dimensions) != self.layout_dimensions:
+                self.relayout(tuple(self.framework.dimensions))
+
+            # Remember where everything was, so drawing can go smoothly between ticks
+            self.trash.save_previous()
+            self.scheduler.update(self, dt, events)
         else:
             user = {"name":self.name, "gender":self.gender}
             score = {
                 "right": self.right,
                 "wrong": self.wrong,
-                "percentage": str(round(self.right/(self.right+self.wrong) * 100, 2))
+                # Always a string, like every other entry on the leaderboard
+                "percentage": str(round(self.right/(self.right+self.wrong) * 100, 2)) if self.right + self.wrong else "0.0"
             }
-            self.framework.enter_leaderboard(user, score)
\ No newline at end of file
+            self.framework.enter_leaderboard(user, score)
+
+    def event_types(self):
+        return self.scheduler.event_types() | self.render_scheduler.event_types()
+
+    def idle_timeout(self):
+        """Nothing moves while we're paused, so don't draw until something happens"""
+        return math.inf if self.paused and not self.over else None
+
+    def render(self, dt: float, alpha: float):
+        """This code gets run every frame, however many ticks happened since the last one."""
+        if not self.over:
+            self.alpha = alpha
+            self.render_scheduler.update(self, dt, [])
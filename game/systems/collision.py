@@ -1,39 +1,153 @@
 import pygame
+import numpy as np
 
+from collections import namedtuple
+
+from lib.audio import audio
 from lib.system import System
+from game.components import Position, Sprite, Collider
+
+# Everything that landed in a bin this tick: trash rows, bin kinds and whether it was the right bin
+CollisionHits = namedtuple("CollisionHits", ["items", "bins", "correct"])
 
 class CollisionSystem(System):
 
+    # Trash has to have moved before we check it
+    after = ("UserInputSystem",)
+
     def __init__(self):
-        pass
+        # Bin bounds only change when the layout does
+        self.bounds_version = None
+        self.hits = self.no_hits()
 
     def update(self, game, dt: float, events):
-        trash = game.items["trash"]
-        bins = game.items["bins"]
-
-        trash_pos = self.centerPosition(trash["pos"], trash["sprite"].tile_size)
-
-        # TODO: I could check for the smallest distance, but I will do that later
-        # I need a formula for bins positioning
-        bin_index = 0
-        for dustbin in bins["pos"]:
-            bin_pos = self.centerPosition(dustbin, bins["sprite"].tile_size)
-            distance = self.getDiagonal(bins["sprite"].tile_size) + self.getDiagonal(trash["sprite"].tile_size)
-            if self.distanceBetween(bin_pos, trash_pos) <= distance:
-                
-                # Checks if it is the right bin
-                if trash["index"] // 3 == bin_index:
-                    game.right += 1
-                else:
-                    game.wrong += 1
-
-                trash["falling"] = False
-                break
-            
-            bin_index += 1
+        hits = self.find_hits(game)
+        self.hits = hits
+        trash = game.trash
+
+        # Score everything that landed
+        if len(hits.items):
+            right = int(np.count_nonzero(hits.correct))
+            game.right += right
+            game.wrong += len(hits.items) - right
+            trash.falling[hits.items] = False
+
+            # One sound of each kind a tick, however much landed
+            if right:
+                audio.play("right")
+            if right < len(hits.items):
+                audio.play("wrong")
+
+        # Anything that fell off the bottom without going through a bin is a miss.
+        # This has to wait until now, trash can pass through a bin and off the screen in one tick
+        falling = trash.falling[:trash.count]
+        missed = falling & (trash.pos[:trash.count, 1] >= game.framework.dimensions[1])
+        missed_count = int(np.count_nonzero(missed))
+        if missed_count:
+            falling[missed] = False
+            game.wrong += missed_count
+            audio.play("miss")
 
         # TODO: Open the bins if trash x is in range
 
+    def find_hits(self, game):
+        """Works out which falling trash touched a bin this tick, each piece lands in the first bin it reached.
+
+        We test the whole path from where the trash was last tick to where it is
+        now, not just where it ended up, so fast trash can't jump over a bin
+        however far it moves in a tick, e.g. dropping at a low tick rate"""
+        trash = game.trash
+        self.update_bounds(game)
+
+        falling = np.flatnonzero(trash.falling[:trash.count])
+        if len(falling) == 0 or len(self.centres) == 0:
+            return self.no_hits()
+
+        starts = trash.prev[falling] + self.trash_half_size
+        ends = trash.pos[falling] + self.trash_half_size
+
+        # Broad phase, first on y: a path that stays above the highest bin's reach can't touch a bin
+        near = np.maximum(starts[:, 1], ends[:, 1]) >= self.top
+        candidates = falling[near]
+        starts = starts[near]
+        ends = ends[near]
+        if len(candidates) == 0:
+            return self.no_hits()
+
+        # Then sweep and prune on x: bins are sorted by the left of their reach, so the ones
+        # whose reach overlaps the path's x range start between its left - widest reach and its right
+        lows = np.minimum(starts[:, 0], ends[:, 0])
+        highs = np.maximum(starts[:, 0], ends[:, 0])
+        first = np.searchsorted(self.lefts, lows - self.max_span, "left")
+        last = np.searchsorted(self.lefts, highs, "right")
+        counts = last - first
+
+        # Every (trash, bin) pair the broad phase let through
+        pair_items = np.repeat(np.arange(len(candidates)), counts)
+        offsets = np.repeat(np.cumsum(counts) - counts, counts)
+        pair_bins = self.order[np.arange(len(pair_items)) - offsets + np.repeat(first, counts)]
+
+        # Narrow phase: when (0 to 1 along the path) does the trash's centre first get within reach of
+        # the bin's? Solving |start + t * path - centre|^2 = reach^2 for t, with a = path.path,
+        # b = 2 * offset.path and c = offset.offset - reach^2
+        path = ends[pair_items] - starts[pair_items]
+        offset = starts[pair_items] - self.centres[pair_bins]
+        a = (path * path).sum(axis=1)
+        b = 2 * (offset * path).sum(axis=1)
+        c = (offset * offset).sum(axis=1) - self.reach_squared[pair_bins]
+        discriminant = b * b - 4 * a * c
+
+        # Already touching at the start, or the path gets within reach before it ends
+        moving = (a > 0) & (discriminant >= 0)
+        entry = np.zeros(len(pair_items))
+        entry[moving] = (-b[moving] - np.sqrt(discriminant[moving])) / (2 * a[moving])
+        touching = (c <= 0) | (moving & (entry >= 0) & (entry <= 1))
+        entry[c <= 0] = 0.0
+
+        pair_items = pair_items[touching]
+        pair_bins = pair_bins[touching]
+        entry = entry[touching]
+
+        # Only keep the first bin each piece reaches, the bin order breaks ties
+        order = np.lexsort((pair_bins, entry, pair_items))
+        pair_items = pair_items[order]
+        pair_bins = pair_bins[order]
+        pair_items, keep = np.unique(pair_items, return_index=True)
+        pair_bins = pair_bins[keep]
+
+        items = candidates[pair_items]
+        kinds = self.kinds[pair_bins]
+        return CollisionHits(items, kinds, trash.index[items] // 3 == kinds)
+
+    def update_bounds(self, game):
+        """Caches the centre and reach of every bin until the next relayout"""
+        if self.bounds_version == game.static_version:
+            return
+
+        trash = game.trash
+        bins = list(game.entities.query(Position, Sprite, Collider))
+
+        self.trash_half_size = np.array(self.centerPosition((0, 0), trash.sprite.tile_size))
+        self.centres = np.array([self.centerPosition(position.get(), sprite.sheet.tile_size) for _, position, sprite, _ in bins],
+                                dtype=np.float64).reshape(-1, 2)
+        self.kinds = np.array([collider.kind for _, _, _, collider in bins], dtype=np.intp)
+
+        # Trash touches a bin when their centres are closer than both half diagonals together
+        trash_reach = self.getDiagonal(trash.sprite.tile_size)
+        reach = np.array([self.getDiagonal(sprite.sheet.tile_size) + trash_reach for _, _, sprite, _ in bins], dtype=np.float64)
+        self.reach_squared = reach ** 2
+
+        lefts = self.centres[:, 0] - reach
+        self.order = np.argsort(lefts, kind="stable")
+        self.lefts = lefts[self.order]
+        self.max_span = 2 * reach.max() if len(reach) else 0
+        self.top = (self.centres[:, 1] - reach).min() if len(reach) else 0
+
+        self.bounds_version = game.static_version
+
+    def no_hits(self):
+        return CollisionHits(np.zeros(0, dtype=np.intp), np.zeros(0, dtype=np.intp), np.zeros(0, dtype=bool))
+
     def distanceBetween(self, posA, posB):
         """Returns the distance between two points"""
         x = posB[0] - posA[0]
@@ -0,0 +1,28 @@
+from lib.system import System
+from lib.assets import assets
+from lib.textcache import text_cache
+
+class HudSystem(System):
+    """This system works out the score, name and time texts shown in the corner."""
+
+    # The texts only change a few times a second
+    rate = 10
+
+    def __init__(self):
+        font_path = 'assets/fonts/nyala.ttf'
+        self.font = assets.font(font_path, 45)
+
+    def update(self, game, dt: float, events):
+        # Text and colour
+        texts = [("Trash successfully recycled: " + str(game.right), (0, 0, 0), 0),
+                 ("Trash not recycled: " + str(game.wrong), (0, 0, 0), 0),
+                 ("Name: " + game.name, ((66, 179, 244) if game.gender == "Boy" else (244, 66, 241)), 0),
+                 ("Time remaining: " + str(int(game.remaining_time)), (0, 0, 0), 0)]
+
+        # RenderSystem draws these every frame
+        game.hud = []
+        top_offset = 0
+        for text in texts:
+            game.hud.append((text_cache.render(self.font, text[0], False, text[1]), (text[2], top_offset)))
+
+            top_offset += 30
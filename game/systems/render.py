@@ -1,144 +1,178 @@
 import pygame
+import numpy as np
 
 from lib.system import System
+from game.components import Position, Sprite, Shape
+from lib.renderqueue import RenderQueue
 from lib.spritesheet import SpriteSheet
+from lib.assets import assets
+from lib.textcache import text_cache
+from lib.trace import tracer
 
 class RenderSystem(System):
-    """This system draws any entity with a SpriteSheet component."""
+    """This system draws any entity with a Sprite or Shape component, and the trash."""
+
+    # The HUD texts need to be ready before we draw them
+    after = ("HudSystem",)
+
+    # Draw the background, bins and pause button as one pre-composited surface
+    use_static_layer = True
+
+    # What gets drawn over what
+    BACKGROUND_LAYER = 0
+    ENTITY_LAYER = 1
+    TRASH_LAYER = 2
+    HUD_LAYER = 3
+    OVERLAY_LAYER = 4
 
     def __init__(self, screen):
         self.screen = screen
-        self.image_cache = {}
+        # Everything gets queued up and drawn with one blits call at the end
+        self.queue = RenderQueue(screen)
+        # Solid surfaces for plain shapes, by size and colour
+        self.shape_surfaces = {}
+        self.background_cache = {}
+        self.static_layer = None
+        self.static_layer_version = None
         self.steps = 0
 
         font_path = 'assets/fonts/nyala.ttf'
-        self.font = pygame.font.Font(font_path, 45)
-        self.paused_font = pygame.font.Font(font_path, 105)
+        self.paused_font = assets.font(font_path, 105)
+        self.overlay_font = assets.font(font_path, 30)
+
+        # The overlay's numbers, only worked out a couple of times a second
+        self.overlay_texts = []
+        self.overlay_age = 0
 
     def update(self, game, dt: float, events):
+        framework = game.framework
+
         # Step through 15 sprite frames each second
         self.steps += dt
         frame = int(self.steps // (1.0 / 15))
 
+        queue = self.queue
+        queue.begin(framework.dirty_rects)
+
         # We need to include gamestate when drawing background to scale the image
         self.draw_background(game)
 
-        # Draw all the entities
-        for key in game.items:
-            item = game.items[key]
+        # Draw all the entities with a sprite, static ones are already part of the static layer
+        for _, position, sprite in game.entities.query(Position, Sprite):
+            if sprite.static and self.use_static_layer:
+                continue
+            # Static entities don't move, so they never make anything dirty
+            queue.submit(self.get_image(sprite.sheet, sprite.index), position.get(), self.ENTITY_LAYER, dirty=not sprite.static)
 
-            # Draw pause button
-            if "sprite" not in item.keys():
-                for pos in item["pos"]:
-                    pygame.draw.rect(self.screen, (0, 0, 0), pos)
+        # And the plain shapes, e.g. the pause button
+        for shape in game.entities.view(Shape).values():
+            if shape.static and self.use_static_layer:
                 continue
+            for rect in shape.rects:
+                queue.submit(self.get_shape_surface(rect[2:], shape.colour), rect[:2], self.ENTITY_LAYER, dirty=not shape.static)
+
+        self.draw_trash(game)
 
-            if isinstance(item["index"], list):
-                # Draw more items from the same sprite (bins)
-                if len(item["index"]) != len(item["pos"]):
-                    raise ValueError("Pos and index lists need to have the same length")
-
-                for i in range(len(item["index"])):
-                    self.screen.blit(self.get_image(item["sprite"], item["index"][i]), item["pos"][i])
-            else:
-                # Draw one item only (trash)
-                self.screen.blit(self.get_image(item["sprite"], item["index"]), item["pos"])    
-        
-        # Text and colour
-        texts = [("Trash successfully recycled: " + str(game.right), (0, 0, 0), 0),
-                 ("Trash not recycled: " + str(game.wrong), (0, 0, 0), 0),
-                 ("Name: " + game.name, ((66, 179, 244) if game.gender == "Boy" else (244, 66, 241)), 0),
-                 ("Time remaining: " + str(int(game.remaining_time)), (0, 0, 0), 0)]
-
-        top_offset = 0
-        for text in texts:
-            rendered_text = self.font.render(text[0], False, text[1])                
-            self.screen.blit(rendered_text, (text[2], top_offset))
-            
-            top_offset += 30
+        # HudSystem keeps the texts up to date
+        for surface, pos in game.hud:
+            queue.submit(surface, pos, self.HUD_LAYER)
 
         if game.paused:
-            rendered_text = self.paused_font.render("PAUSED", False, (255, 255, 255))
-            self.screen.blit(rendered_text, (game.framework.dimensions[0]/2-180, game.framework.dimensions[1]/2-105))
+            rendered_text = text_cache.render(self.paused_font, "PAUSED", False, (255, 255, 255))
+            queue.submit(rendered_text, (game.framework.dimensions[0]/2-180, game.framework.dimensions[1]/2-105), self.HUD_LAYER)
+
+        if tracer.overlay:
+            self.draw_overlay(game, dt)
+
+        for rect in queue.flush():
+            framework.mark_dirty(rect)
+
+    def draw_trash(self, game):
+        """Queues all the trash, between where it was last tick and where it is now"""
+        trash = game.trash
+        if trash.count == 0:
+            return
+
+        # Anything completely off the screen doesn't get drawn at all
+        positions = trash.interpolated(game.alpha)
+        width, height = self.queue.width, self.queue.height
+        visible = ((positions[:, 0] < width) & (positions[:, 1] < height) &
+                   (positions[:, 0] + trash.size > 0) & (positions[:, 1] + trash.size > 0))
+        self.queue.culled += trash.count - int(np.count_nonzero(visible))
+
+        tiles = self.get_tiles(trash.sprite)
+        commands = [(tiles[index], pos) for index, pos in zip(trash.index[:trash.count][visible].tolist(), positions[visible].tolist())]
+        self.queue.extend(commands, (trash.size, trash.size), self.TRASH_LAYER)
+
+    def draw_overlay(self, game, dt):
+        """Shows live fps, frame time percentiles and the slowest systems under the HUD"""
+        self.overlay_age -= dt
+        if self.overlay_age <= 0:
+            stats = tracer.summary()
+            self.overlay_texts = [
+                "{0:.0f} fps".format(stats["fps"]),
+                "frame p50 {0:.2f} p95 {1:.2f} p99 {2:.2f} ms".format(stats["p50"], stats["p95"], stats["p99"]),
+            ] + ["{0} {1:.2f} ms".format(name, ms) for name, ms in stats["systems"]]
+            self.overlay_age = 0.5
+
+        top_offset = 130
+        for text in self.overlay_texts:
+            rendered_text = text_cache.render(self.overlay_font, text, False, (255, 255, 255))
+            self.queue.submit(rendered_text, (0, top_offset), self.OVERLAY_LAYER)
+            top_offset += 24
 
     def draw_background(self, game):
-        self.screen.blit(self.get_image(game.background, 0, game), (0, 0))
-
-    def get_image(self, spritesheet, index, game=None):
-        # Ideally, we cache so we only process a file once
-        if spritesheet.path not in self.image_cache or game is not None:
-            # Load from file
-            sheet_img = pygame.image.load(spritesheet.path).convert_alpha()
-            
-            # Scale the image
-            if spritesheet.scale != 1:
-                scaled_size = (int(spritesheet.scale * sheet_img.get_width()), int(spritesheet.scale * sheet_img.get_height()))
-                sheet_img = pygame.transform.scale(sheet_img, scaled_size)
-
-            if spritesheet.path.endswith("Background.fw.png"):
-                # This happens when resizing
-                if sheet_img.get_size() != game.framework.dimensions:
-                    old_background_tile = game.background.tile_size
-
-                    game.background.tile_size = game.framework.dimensions
-                    sheet_img = pygame.transform.scale(sheet_img, game.framework.dimensions)
-
-                    # Fixing the bins too
-                    # Get the image
-                    sheet_bins = pygame.image.load(game.items["bins"]["sprite"].path).convert_alpha()
-                    
-                    curr_bin_tile_size = game.items["bins"]["sprite"].tile_size
-                    # Make a new tile size using the formula bw' = bw * (BW' / BW) 
-                    new_tile_size = (int((curr_bin_tile_size[0] * 6) * (game.background.tile_size[0] / old_background_tile[0]) / 6),
-                                     int(curr_bin_tile_size[1] * (game.background.tile_size[1] / old_background_tile[1])))
-
-                    # Scale the real image to our new sizes (width = tw * 6 because the sprite has 6 images)
-                    sheet_bins = pygame.transform.scale(sheet_bins, (new_tile_size[0] * 6, new_tile_size[1]))
-                    game.items["bins"]["sprite"].tile_size = new_tile_size
-
-                    game.items["bins"]["pos"] = [
-                        [new_tile_size[0], game.framework.dimensions[1] - new_tile_size[1]],
-                        [new_tile_size[0] + (game.framework.dimensions[0] - 3 * new_tile_size[0]) / 2, game.framework.dimensions[1] - new_tile_size[1]],
-                        [game.framework.dimensions[0] - 2 * new_tile_size[0], game.framework.dimensions[1] - new_tile_size[1]]
-                    ]
-
-                    # Now caching the new images to our array
-                    images = []
-                    for y in range(0, sheet_bins.get_height(), new_tile_size[1]):
-                        for x in range(0, sheet_bins.get_width(), new_tile_size[0]):
-                            bounds = pygame.Rect(x, y, new_tile_size[0], new_tile_size[1])
-                            images.append(sheet_bins.subsurface(bounds))
-                    self.image_cache[game.items["bins"]["sprite"].path] = images
-
-                    # Getting new pause button position
-                    game.items["pause"]["pos"]=[
-                        [game.framework.dimensions[0] - 50, 10, 10, 50], 
-                        [game.framework.dimensions[0] - 25, 10, 10, 50]
-                    ]
-                    game.items["pause"]["rect"] = [game.framework.dimensions[0]-50, 10, 35, 50]
-
-                else:
-                    if spritesheet.path in self.image_cache:
-                        return self.image_cache[spritesheet.path][index]
-
-            if isinstance(spritesheet.tile_size, tuple):
-                tile_width = spritesheet.tile_size[0]
-                tile_height = spritesheet.tile_size[1]
-            else:
-                tile_width = spritesheet.tile_size
-                tile_height = spritesheet.tile_size
-            
-            # Check the file can be divided right
-            if sheet_img.get_width() % tile_width != 0 or sheet_img.get_height() % tile_height != 0:
-                print(sheet_img.get_width(), tile_width)
-                raise ValueError('Spritesheet width and height are not a multiple of its tile size')
-            
-            # Partition into sub-images
-            images = []
-            for y in range(0, sheet_img.get_height(), tile_height * spritesheet.scale):
-                for x in range(0, sheet_img.get_width(), tile_width * spritesheet.scale):
-                    bounds = pygame.Rect(x, y, tile_width * spritesheet.scale, tile_height * spritesheet.scale)
-                    images.append(sheet_img.subsurface(bounds))
-            self.image_cache[spritesheet.path] = images
-
-        return self.image_cache[spritesheet.path][index]
\ No newline at end of file
+        dimensions = tuple(game.framework.dimensions)
+
+        # The window was resized since the last tick, catch up so we don't draw the old layout
+        if dimensions != game.layout_dimensions:
+            game.relayout(dimensions)
+
+        # Only rebuild the background when the window size changed, we only keep the current size
+        if dimensions not in self.background_cache:
+            self.background_cache = {dimensions: assets.scaled(game.background.path, dimensions, alpha=False)}
+            self.static_layer_version = None
+
+        background = self.background_cache[dimensions]
+        if self.use_static_layer:
+            # Bins and the pause button only change on relayout or when a bin changes its image
+            if self.static_layer_version != game.static_version:
+                self.compose_static_layer(game, background)
+            background = self.static_layer
+        game.framework.background = background
+
+        # In dirty-rect mode the framework restores the regions that changed for us
+        if game.framework.full_redraw or not game.framework.dirty_rects:
+            self.queue.submit(background, (0, 0), self.BACKGROUND_LAYER, dirty=False)
+
+    def compose_static_layer(self, game, background):
+        """Draws the bins and pause button onto a copy of the background"""
+        self.static_layer = background.copy()
+
+        for _, position, sprite in game.entities.query(Position, Sprite):
+            if sprite.static:
+                self.static_layer.blit(self.get_image(sprite.sheet, sprite.index), position.get())
+
+        for shape in game.entities.view(Shape).values():
+            if shape.static:
+                for rect in shape.rects:
+                    pygame.draw.rect(self.static_layer, shape.colour, rect)
+
+        self.static_layer_version = game.static_version
+
+    def get_image(self, spritesheet, index):
+        return self.get_tiles(spritesheet)[index]
+
+    def get_tiles(self, spritesheet):
+        # The asset manager only processes a file once per size
+        return assets.tiles(spritesheet.path, spritesheet.tile_size, spritesheet.scale, spritesheet.sheet_size)
+
+    def get_shape_surface(self, size, colour):
+        """A solid surface to draw a plain rectangle with, so it can go in the queue with everything else"""
+        key = (int(size[0]), int(size[1]), tuple(colour))
+        surface = self.shape_surfaces.get(key)
+        if surface is None:
+            surface = pygame.Surface(key[:2]).convert()
+            surface.fill(colour)
+            self.shape_surfaces[key] = surface
+        return surface
@@ -1,75 +1,79 @@
-import random
 import pygame
+import numpy as np
 
 from lib.system import System
+from lib.events import EventBus
+from game.components import Button
 
 class UserInputSystem(System):
     """This system updates the game based on inputs"""
 
-    def __init__(self):
+    # Pixels a second, times dt, so the game plays the same at any tick rate.
+    # At 60 ticks a second that's 10 (times the speed-up) a tick falling, 55 steering and 50 dropping
+    fall_speed = 600
+    steer_speed = 3300
+    drop_speed = 3000
+
+    def __init__(self, round_time=20):
         self.increasing_vel = 1
         self.timer_started = False
         self.passed_time = 0
         self.start_time = 0
-        self.time_when_paused = 20
+        self.time_when_paused = round_time
+
+        self.bus = EventBus()
+        self.bus.on(pygame.MOUSEBUTTONDOWN, self.on_click)
+
+    def on_click(self, event, game):
+        """Clicking the pause button pauses and unpauses"""
+        if game.entities.get(game.pause_button, Button).contains(game.framework.input.get_mouse_pos()):
+            game.paused = not game.paused
+
+            if not game.paused:
+                game.start_time = game.framework.clock.get_ticks()
+            else:
+                self.time_when_paused = game.remaining_time
 
     def update(self, game, dt: float, events):
-        keysdown = pygame.key.get_pressed()
-        mouse_pos = pygame.mouse.get_pos()
-
-        pause_btn = game.items["pause"]
-        for event in events:
-            if event.type == pygame.MOUSEBUTTONDOWN:
-                is_x_in_range = mouse_pos[0] > pause_btn["rect"][0] and mouse_pos[0] < pause_btn["rect"][0] + pause_btn["rect"][2]
-                is_y_in_range = mouse_pos[1] > pause_btn["rect"][1] and mouse_pos[1] < pause_btn["rect"][1] + pause_btn["rect"][3]
-                if is_x_in_range and is_y_in_range:
-                    game.paused = not game.paused
-
-                    if not game.paused:
-                        game.start_time = pygame.time.get_ticks()
-                    else:
-                        self.time_when_paused = game.remaining_time
+        keysdown = game.framework.input.get_pressed()
+        self.bus.dispatch(events, game)
 
         if game.remaining_time <= 0:
             game.over = True
 
-        trash = game.items["trash"]
+        trash = game.trash
+        width_limit = game.framework.dimensions[0] - trash.size
 
         if not game.paused:
-            if trash["falling"] == False:
-                # Pick a different trash
-                trash["index"] = random.randint(0, 8)
-                # Starting y-point
-                trash["pos"][1] = 50
-                # Random x-point
-                trash["pos"][0] = random.randint(0, 
-                                                game.framework.dimensions[0] - 
-                                                (trash["sprite"].scale * trash["sprite"].tile_size)
-                                                ) 
-
-                trash["falling"] = True
-            else:
+            # Trash that landed (or was missed) last tick makes room for new trash
+            trash.despawn_landed()
+
+            while trash.count < game.framework.trash_count:
+                # Pick a different trash, starting at the top at a random x-point
+                index = game.framework.random.randint(0, 8)
+                trash.spawn(index, game.framework.random.randint(0, width_limit), 50)
+
+            if trash.count:
                 # Constraining the increasing velocity
                 self.increasing_vel = self.increasing_vel + (dt * 0.05) if self.increasing_vel <= 5 else self.increasing_vel
-                trash["pos"][1] += 10 * self.increasing_vel
 
-                if trash["pos"][1] >= game.framework.dimensions[1]:
-                    trash["falling"] = False
-                    game.wrong += 1
-            
+                # New trash moves straight away too, waiting a tick would make slow tick rates slower
+                vel = trash.vel[:trash.count]
+                vel[:, 1] = self.fall_speed * self.increasing_vel
+                trash.pos[:trash.count] += vel * dt
+
+            pos = trash.pos[:trash.count]
+
             # Change x position based on user input
             if keysdown[pygame.K_LEFT]:
-                trash["pos"][0] -= 55
+                pos[:, 0] -= self.steer_speed * dt
             elif keysdown[pygame.K_RIGHT]:
-                trash["pos"][0] += 55
+                pos[:, 0] += self.steer_speed * dt
             elif keysdown[pygame.K_DOWN]:
-                trash["pos"][1] += 50
-            
+                pos[:, 1] += self.drop_speed * dt
+
             # Constrain x value
-            if trash["pos"][0] > game.framework.dimensions[0] - (trash["sprite"].scale * trash["sprite"].tile_size):
-                trash["pos"][0] = game.framework.dimensions[0] - (trash["sprite"].scale * trash["sprite"].tile_size)
-            elif trash["pos"][0] < 0:
-                trash["pos"][0] = 0
+            np.clip(pos[:, 0], 0, width_limit, out=pos[:, 0])
 
-            self.passed_time = pygame.time.get_ticks() - game.start_time
-            game.remaining_time = self.time_when_paused - (self.passed_time/1000)
\ No newline at end of file
+            self.passed_time = game.framework.clock.get_ticks() - game.start_time
+            game.remaining_time = self.time_when_paused - (self.passed_time/1000)
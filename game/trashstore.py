@@ -0,0 +1,79 @@
+import numpy as np
+
+
+class TrashStore:
+    """All of the falling trash, kept as one NumPy array per component.
+
+    Item i has its top-left corner at pos[i] (and had it at prev[i] before the
+    last tick), moves by vel[i] pixels a second, shows
+    sprite tile index[i] and is still in play while falling[i]. Only the first
+    count rows are in use, the rest is spare capacity. Removing an item moves the
+    last one into its place, so the live rows always stay packed at the front."""
+
+    def __init__(self, sprite, capacity=16):
+        self.sprite = sprite
+        # How wide/tall an item is on screen
+        self.size = sprite.scale * sprite.tile_size
+
+        self.count = 0
+        self.pos = np.zeros((capacity, 2), dtype=np.float64)
+        self.prev = np.zeros((capacity, 2), dtype=np.float64)
+        self.vel = np.zeros((capacity, 2), dtype=np.float64)
+        self.index = np.zeros(capacity, dtype=np.int32)
+        self.falling = np.zeros(capacity, dtype=bool)
+
+    @property
+    def capacity(self):
+        return len(self.index)
+
+    def grow(self):
+        """Doubles the space we have, only happens when spawning more than we ever had"""
+        capacity = self.capacity * 2
+        for name in ("pos", "prev", "vel", "index", "falling"):
+            old = getattr(self, name)
+            new = np.zeros((capacity,) + old.shape[1:], dtype=old.dtype)
+            new[:self.count] = old[:self.count]
+            setattr(self, name, new)
+
+    def spawn(self, index, x, y):
+        """Adds a new piece of trash and returns where it lives"""
+        if self.count == self.capacity:
+            self.grow()
+
+        i = self.count
+        self.pos[i] = (x, y)
+        # It just appeared, so there's nowhere to move in from
+        self.prev[i] = (x, y)
+        self.vel[i] = (0, 0)
+        self.index[i] = index
+        self.falling[i] = True
+        self.count += 1
+        return i
+
+    def despawn(self, i):
+        """Removes item i by moving the last item into its place"""
+        last = self.count - 1
+        if i != last:
+            self.pos[i] = self.pos[last]
+            self.prev[i] = self.prev[last]
+            self.vel[i] = self.vel[last]
+            self.index[i] = self.index[last]
+            self.falling[i] = self.falling[last]
+        self.count = last
+
+    def despawn_landed(self):
+        """Removes everything that isn't falling any more"""
+        landed = np.flatnonzero(~self.falling[:self.count])
+        # Going backwards means whatever gets swapped in has already been checked
+        for i in landed[::-1]:
+            self.despawn(int(i))
+        return len(landed)
+
+    def save_previous(self):
+        """Remembers where everything is, call before moving things in a tick"""
+        self.prev[:self.count] = self.pos[:self.count]
+
+    def interpolated(self, alpha):
+        """Where everything is drawn, alpha of the way from the last tick's positions to now"""
+        prev = self.prev[:self.count]
+        return prev + (self.pos[:self.count] - prev) * alpha
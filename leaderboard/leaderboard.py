@@ -1,17 +1,98 @@
-import pygame
+import math
+import pygame, pygame.locals
+
+from lib.assets import assets
+from lib.events import EventBus
+from lib.textcache import text_cache
+from leaderboard.listview import LeaderboardView
 
 class LeaderboardState:
     """The state that renders the leaderboard and adds a new entry
     """
     
     def __init__(self, framework, user, score):
-        pass
+        self.framework = framework
+        self.screen = framework.screen
+        self.user = user
+        self.score = score
+
+        # Save the game we just played and find out how well we did
+        self.store = framework.get_leaderboard_store()
+        self.entry = self.store.add(user, score)
+        self.rank = self.store.rank(self.entry)
+
+        font_path = 'assets/fonts/nyala.ttf'
+        self.font = assets.font(font_path, 45)
+        self.header_font = assets.font(font_path, 95)
+
+        # The view (and the rows it's drawn) lasts between games, so only rows whose rank moved get drawn again
+        if framework.leaderboard_view is None:
+            framework.leaderboard_view = LeaderboardView(self.store, self.font)
+        self.view = framework.leaderboard_view
+        self.view.highlight = self.entry
+        self.list_top = 150
+        self.fit_view()
+        self.view.scroll_to(self.rank)
+
+        self.bus = EventBus()
+        self.bus.on(pygame.KEYDOWN, self.on_done, pygame.locals.K_RETURN)
+        self.bus.on(pygame.KEYDOWN, self.on_done, pygame.locals.K_ESCAPE)
+        self.bus.on(pygame.KEYDOWN, self.on_scroll_key, pygame.locals.K_UP)
+        self.bus.on(pygame.KEYDOWN, self.on_scroll_key, pygame.locals.K_DOWN)
+        self.bus.on(pygame.KEYDOWN, self.on_scroll_key, pygame.locals.K_PAGEUP)
+        self.bus.on(pygame.KEYDOWN, self.on_scroll_key, pygame.locals.K_PAGEDOWN)
+        self.bus.on(pygame.KEYDOWN, self.on_scroll_key, pygame.locals.K_HOME)
+        self.bus.on(pygame.KEYDOWN, self.on_scroll_key, pygame.locals.K_END)
+        self.bus.on(pygame.MOUSEWHEEL, self.on_wheel)
+
+    def fit_view(self):
+        """Shows as many rows as fit between the heading and the line at the bottom"""
+        self.view.resize((self.framework.dimensions[1] - self.list_top - 90) // self.view.row_height)
 
     def update(self, dt: float, events):
-        """This code gets run 60fps. All of our game logic stems from updating
-        our systems on our entities."""
-        pass
+        """This code gets run every tick, it takes us back to the menu when we're done."""
+        self.bus.dispatch(events)
+
+    def on_done(self, event):
+        # Only once, even if both keys came in the same frame
+        if self.framework.state is self:
+            self.framework.enter_menu()
+
+    def on_scroll_key(self, event):
+        rows = {
+            pygame.locals.K_UP: -1,
+            pygame.locals.K_DOWN: 1,
+            pygame.locals.K_PAGEUP: -self.view.visible,
+            pygame.locals.K_PAGEDOWN: self.view.visible,
+            pygame.locals.K_HOME: -len(self.store),
+            pygame.locals.K_END: len(self.store),
+        }[event.key]
+        self.view.scroll(rows)
 
-    def render(self):
+    def on_wheel(self, event):
+        self.view.scroll(-3 * event.y)
+
+    def event_types(self):
+        return self.bus.types()
+
+    def idle_timeout(self):
+        # The board doesn't change while we look at it
+        return math.inf
+
+    def render(self, dt: float, alpha: float):
         """This code will render the list of all of the players"""
-        pass
\ No newline at end of file
+        centre_x = self.framework.dimensions[0] / 2
+
+        self.render_text(self.header_font, "Leaderboard", (centre_x - 230, 20))
+
+        # Only the rows in view get drawn, however big the board is
+        self.fit_view()
+        for rect in self.view.draw(self.screen, (centre_x - 300, self.list_top)):
+            self.framework.mark_dirty(rect)
+
+        top_offset = self.list_top + self.view.visible * self.view.row_height
+        self.render_text(self.font, "You came {0} of {1} with {2} recycled".format(self.rank, len(self.store), self.entry["right"]),
+                         (centre_x - 300, top_offset + 30), (255, 255, 0))
+
+    def render_text(self, font, text, pos=(0, 0), colour=(255, 255, 255)):
+        self.framework.mark_dirty(self.screen.blit(text_cache.render(font, text, False, colour), pos))
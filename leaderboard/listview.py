@@ -0,0 +1,76 @@
+import pygame
+
+from collections import OrderedDict
+
+
+class LeaderboardView:
+    """A scrolling window onto the whole board, however many entries it has.
+
+    Only the rows on screen get drawn. Each row is rasterised once and kept by
+    (rank, name, score), so when a new score goes in only the rows whose rank
+    moved get rendered again, and only once they're scrolled into view.
+    Scrolling just moves which ranks we look up, it doesn't depend on the
+    size of the board."""
+
+    row_height = 45
+
+    def __init__(self, store, font, highlight=None, max_rows=256):
+        self.store = store
+        self.font = font
+        # The entry to show in yellow, e.g. the game we just played
+        self.highlight = highlight
+        self.max_rows = max_rows
+
+        # The rank at the top of the view, 1 is the best
+        self.top = 1
+        self.visible = 1
+
+        self.rows = OrderedDict()
+        self.renders = 0
+
+    def resize(self, visible):
+        """How many rows fit on screen now"""
+        self.visible = max(1, visible)
+        self.scroll(0)
+
+    def scroll(self, rows):
+        """Moves the view down by rows (up if negative), stopping at the ends of the board"""
+        last_top = max(1, len(self.store) - self.visible + 1)
+        self.top = min(max(1, self.top + rows), last_top)
+
+    def scroll_to(self, rank):
+        """Puts rank in the middle of the view"""
+        self.top = rank - self.visible // 2
+        self.scroll(0)
+
+    def row(self, rank, entry):
+        """The surface for one row, rasterised only if we don't have it yet"""
+        highlighted = entry is self.highlight
+        key = (rank, entry["name"], entry["right"], entry["percentage"], highlighted)
+
+        surface = self.rows.get(key)
+        if surface is not None:
+            self.rows.move_to_end(key)
+            return surface
+
+        colour = (255, 255, 0) if highlighted else (255, 255, 255)
+        left = self.font.render("{0}. {1}".format(rank, entry["name"]), False, colour)
+        right = self.font.render("{0} ({1}%)".format(entry["right"], entry["percentage"]), False, colour)
+
+        surface = pygame.Surface((450 + right.get_width(), max(left.get_height(), right.get_height())), pygame.SRCALPHA)
+        surface.blit(left, (0, 0))
+        surface.blit(right, (450, 0))
+        self.renders += 1
+
+        self.rows[key] = surface
+        while len(self.rows) > self.max_rows:
+            self.rows.popitem(last=False)
+        return surface
+
+    def draw(self, screen, pos):
+        """Draws the rows in view from pos down, returns the rects drawn on"""
+        last = min(len(self.store), self.top + self.visible - 1)
+        return [
+            screen.blit(self.row(rank, self.store.at(rank)), (pos[0], pos[1] + (rank - self.top) * self.row_height))
+            for rank in range(self.top, last + 1)
+        ]
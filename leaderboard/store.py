@@ -0,0 +1,143 @@
+import bisect
+import json
+import os
+import time
+
+from leaderboard.writer import LeaderboardWriter
+
+
+class LeaderboardStore:
+    """Every score ever played, kept in an append-only journal file.
+
+    Each entry is one JSON line, written in one go and fsynced, so a crash can
+    only ever half-write the very last line, which we cut off when loading.
+    Any other line we can't read is skipped and counted, never deleted, so one
+    bad line can't take the scores after it with it. In memory we keep every
+    entry's ranking key in sorted order, so finding someone's rank is a binary
+    search, and the entries by seq, so finding who's at a rank isn't.
+    """
+
+    def __init__(self, path=None, background=True):
+        # No path keeps everything in memory, e.g. for headless runs
+        self.path = path
+
+        self.count = 0
+        # Lines in the journal we couldn't read
+        self.skipped = 0
+        self.keys = []
+        self.entries = {}
+
+        # Writes go to disk on another thread, so the game never waits for an fsync
+        self.writer = None
+
+        if path is not None:
+            self.load()
+            if background:
+                self.writer = LeaderboardWriter(self)
+
+    def key(self, entry):
+        """Sorts best first: most right, then best percentage, then whoever got there first"""
+        return (-entry["right"], -float(entry["percentage"]), entry["seq"])
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return
+
+        end = 0
+        fragment = False
+        # One decoder for every line, json.loads works out the encoding of each one again
+        decode = json.JSONDecoder().decode
+        with open(self.path, "rb") as journal:
+            for line in journal:
+                # Only the last line can be missing its newline, a crash half way through writing it
+                if not line.endswith(b"\n"):
+                    fragment = True
+                    break
+                end += len(line)
+
+                try:
+                    entry = decode(line.decode("utf-8"))
+                except ValueError:
+                    # Garbage in the middle, leave it there but don't let it stop us
+                    self.skipped += 1
+                    continue
+                self.index(entry, keep_sorted=False)
+
+        # One sort at the end, inserting every line in order would be quadratic
+        self.keys.sort()
+
+        # Cut off the unfinished line so new entries go on a clean line
+        if fragment:
+            with open(self.path, "r+b") as journal:
+                journal.truncate(end)
+
+    def add(self, user: dict, score: dict):
+        """Saves a finished game and returns its entry"""
+        entry = {
+            "seq": self.count,
+            "name": user["name"],
+            "gender": user["gender"],
+            "right": score["right"],
+            "wrong": score["wrong"],
+            "percentage": score["percentage"],
+            "time": time.time(),
+        }
+        # It's on the board straight away, even if the disk hasn't caught up yet
+        self.index(entry)
+        if self.writer is not None:
+            self.writer.submit(entry)
+        else:
+            self.write([entry])
+        return entry
+
+    def write(self, entries):
+        """Appends entries to the journal and waits until they're safely on disk.
+        With a writer this runs on its thread, so it must only touch the file"""
+        if self.path is None or not entries:
+            return
+
+        data = memoryview("".join(json.dumps(entry, sort_keys=True) + "\n" for entry in entries).encode("utf-8"))
+        # Unbuffered, so if anything fails there's nothing left in a buffer to be written on close
+        with open(self.path, "ab", buffering=0) as journal:
+            size = journal.seek(0, os.SEEK_END)
+            try:
+                while data:
+                    data = data[journal.write(data):]
+                os.fsync(journal.fileno())
+            except OSError:
+                # Don't leave half a batch behind, the next write would carry on from the middle of its line
+                os.ftruncate(journal.fileno(), size)
+                raise
+
+    def index(self, entry, keep_sorted=True):
+        """Adds an entry to the in-memory rank index, without keep_sorted the keys need sorting afterwards"""
+        key = self.key(entry)
+        self.count = max(self.count, entry["seq"] + 1)
+
+        if keep_sorted:
+            bisect.insort(self.keys, key)
+        else:
+            self.keys.append(key)
+        self.entries[entry["seq"]] = entry
+
+    def rank(self, entry):
+        """Where an entry is on the board, 1 is the best"""
+        return bisect.bisect_left(self.keys, self.key(entry)) + 1
+
+    def at(self, rank):
+        """The entry at a rank, 1 is the best"""
+        # The last part of every key is the entry's seq
+        return self.entries[self.keys[rank - 1][-1]]
+
+    def close(self):
+        """Makes sure everything is written, call before quitting"""
+        if self.writer is not None:
+            self.writer.close()
+
+    def stats(self):
+        stats = self.writer.stats() if self.writer is not None else {}
+        stats["skipped_lines"] = self.skipped
+        return stats
+
+    def __len__(self):
+        return len(self.keys)
@@ -0,0 +1,119 @@
+import queue
+import threading
+import time
+
+
+class LeaderboardWriter:
+    """Writes leaderboard entries to disk on a background thread.
+
+    The frame loop only puts entries on a bounded queue. The worker takes
+    everything that's waiting (up to batch_size) and writes it with a single
+    fsync, so a burst of game overs costs one disk flush, not one each.
+
+    A batch that fails to write is tried again a few times, then kept and
+    written first with the next batch, so a disk error doesn't lose scores."""
+
+    # Tells the worker to stop once everything before it is written
+    STOP = object()
+
+    def __init__(self, store, max_queue=256, batch_size=64, retries=3, retry_delay=0.05):
+        self.store = store
+        self.batch_size = batch_size
+        self.retries = retries
+        self.retry_delay = retry_delay
+        self.queue = queue.Queue(max_queue)
+        # Entries we couldn't write yet, they go in front of the next batch
+        self.failed = []
+
+        # Metrics
+        self.written = 0
+        self.batches = 0
+        self.errors = 0
+        self.stalls = 0
+        self.max_depth = 0
+        self.last_latency = 0.0
+        self.max_latency = 0.0
+        self.total_latency = 0.0
+
+        self.thread = threading.Thread(target=self.run, name="LeaderboardWriter", daemon=True)
+        self.thread.start()
+
+    def submit(self, entry):
+        """Queues an entry to be written, this never waits for the disk"""
+        item = (entry, time.perf_counter())
+        try:
+            self.queue.put_nowait(item)
+        except queue.Full:
+            # Only if the disk is hopelessly behind, losing scores is worse than a hitch
+            self.stalls += 1
+            self.queue.put(item)
+        self.max_depth = max(self.max_depth, self.queue.qsize())
+
+    def run(self):
+        while True:
+            batch = [self.queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            stopping = any(item is self.STOP for item in batch)
+            items = self.failed + [item for item in batch if item is not self.STOP]
+            self.failed = []
+
+            if items:
+                if not self.write(items):
+                    # Keep them for next time, the disk might have come back by then
+                    self.failed = items
+                else:
+                    now = time.perf_counter()
+                    for _, submitted in items:
+                        latency = now - submitted
+                        self.total_latency += latency
+                        self.max_latency = max(self.max_latency, latency)
+                        self.last_latency = latency
+                    self.written += len(items)
+                    self.batches += 1
+
+            for _ in batch:
+                self.queue.task_done()
+
+            if stopping:
+                return
+
+    def write(self, items):
+        """Writes a batch, trying again a few times if the disk fails, returns whether it got written"""
+        for attempt in range(self.retries):
+            try:
+                self.store.write([entry for entry, _ in items])
+                return True
+            except OSError:
+                self.errors += 1
+                if attempt + 1 < self.retries:
+                    time.sleep(self.retry_delay * 2 ** attempt)
+        return False
+
+    def flush(self):
+        """Waits until everything queued so far is on disk, or has failed and is waiting to be tried again"""
+        self.queue.join()
+
+    def close(self):
+        """Writes whatever is left and stops the worker"""
+        if self.thread.is_alive():
+            self.queue.put(self.STOP)
+            self.thread.join()
+
+    def stats(self):
+        return {
+            "queue_depth": self.queue.qsize(),
+            "max_queue_depth": self.max_depth,
+            "written": self.written,
+            "batches": self.batches,
+            "errors": self.errors,
+            "unwritten": len(self.failed),
+            "stalls": self.stalls,
+            "last_latency": self.last_latency,
+            "max_latency": self.max_latency,
+            "mean_latency": self.total_latency / self.written if self.written else 0.0,
+        }
@@ -0,0 +1,151 @@
+import os
+import pygame
+
+from collections import OrderedDict
+
+
+class AssetManager:
+    """Loads images, scaled images, sprite tiles and fonts once and shares them.
+
+    Everything lives in one LRU, so once we hold more than budget bytes the
+    assets we haven't used for the longest get dropped (e.g. tiles for a
+    window size we resized away from)."""
+
+    def __init__(self, budget=64 * 1024 * 1024):
+        self.budget = budget
+        self.entries = OrderedDict()
+        self.resident_bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+        # Pre-scaled images and tiles to use instead of decoding and scaling PNGs
+        self.atlas = None
+        # When a list, every scaled image and set of tiles we make gets added to it, for baking an atlas
+        self.recording = None
+
+    def image(self, path, alpha=True):
+        """The image at path, converted for fast blitting"""
+        key = ("image", path, alpha)
+        asset = self.get(key)
+        if asset is None:
+            asset = pygame.image.load(path)
+            asset = asset.convert_alpha() if alpha else asset.convert()
+            self.put(key, asset, self.surface_bytes(asset))
+        return asset
+
+    def image_size(self, path):
+        """The native size of the image at path, without loading it if the atlas knows"""
+        if self.atlas is not None and self.atlas.source_size(path) is not None:
+            return self.atlas.source_size(path)
+        return self.image(path).get_size()
+
+    def scaled(self, path, size, smooth=False, alpha=True):
+        """The image at path, scaled to size"""
+        size = (int(size[0]), int(size[1]))
+        key = ("scaled", path, size, smooth, alpha)
+        asset = self.get(key)
+        if asset is None and self.atlas is not None:
+            asset = self.atlas.lookup(key)
+            if asset is not None:
+                self.put(key, asset, self.surface_bytes(asset))
+        if asset is None:
+            image = self.image(path, alpha)
+            if image.get_size() == size:
+                asset = image
+            elif smooth:
+                asset = pygame.transform.smoothscale(image, size)
+            else:
+                asset = pygame.transform.scale(image, size)
+            # At its native size it's the same surface as the image entry, so its bytes are already counted
+            self.put(key, asset, 0 if asset is image else self.surface_bytes(asset))
+        return asset
+
+    def tiles(self, path, tile_size, scale=1, size=None):
+        """A list of tiles sliced out of the spritesheet at path.
+
+        The sheet is scaled to size (or by scale) and each tile is tile_size * scale"""
+        if isinstance(tile_size, tuple):
+            tile_width, tile_height = tile_size
+        else:
+            tile_width = tile_height = tile_size
+
+        key = ("tiles", path, tile_size, scale, size)
+        asset = self.get(key)
+        if asset is None and self.atlas is not None:
+            asset = self.atlas.lookup(key)
+            if asset is not None:
+                self.put(key, asset, self.surface_bytes(asset[0].get_parent()))
+        if asset is None:
+            image = sheet = self.image(path)
+            if size is None:
+                size = (int(scale * sheet.get_width()), int(scale * sheet.get_height()))
+            if sheet.get_size() != size:
+                sheet = pygame.transform.scale(sheet, size)
+
+            tile_width *= scale
+            tile_height *= scale
+
+            # Check the file can be divided right
+            if sheet.get_width() % tile_width != 0 or sheet.get_height() % tile_height != 0:
+                raise ValueError('Spritesheet width and height are not a multiple of its tile size')
+
+            # Partition into sub-images, they all share the sheet's pixels
+            asset = []
+            for y in range(0, sheet.get_height(), tile_height):
+                for x in range(0, sheet.get_width(), tile_width):
+                    asset.append(sheet.subsurface(pygame.Rect(x, y, tile_width, tile_height)))
+            # Unscaled tiles share the image entry's pixels, which are already counted
+            self.put(key, asset, 0 if sheet is image else self.surface_bytes(sheet))
+        return asset
+
+    def font(self, path, size):
+        key = ("font", path, size)
+        asset = self.get(key)
+        if asset is None:
+            asset = pygame.font.Font(path, size)
+            self.put(key, asset, os.path.getsize(path))
+        return asset
+
+    def get(self, key):
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self.entries.move_to_end(key)
+        return entry[0]
+
+    def put(self, key, asset, size):
+        self.entries[key] = (asset, size)
+        self.resident_bytes += size
+
+        if self.recording is not None and key[0] in ("scaled", "tiles"):
+            self.recording.append((key, asset))
+
+        # Evict the least recently used assets, but never the one we've just loaded
+        while self.resident_bytes > self.budget and len(self.entries) > 1:
+            old_key, (old_asset, old_size) = self.entries.popitem(last=False)
+            self.resident_bytes -= old_size
+
+    def surface_bytes(self, surface):
+        return surface.get_pitch() * surface.get_height()
+
+    def clear(self):
+        self.entries.clear()
+        self.resident_bytes = 0
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "entries": len(self.entries),
+            "resident_bytes": self.resident_bytes,
+            "budget": self.budget,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+
+# One manager for the whole process, so the menus and the game share what they load
+assets = AssetManager()
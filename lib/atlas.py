@@ -0,0 +1,140 @@
+import hashlib
+import json
+import mmap
+import os
+import pygame
+
+
+class SpriteAtlas:
+    """Pre-scaled images and sprite tiles baked into one raw pixel file.
+
+    The atlas is two files in directory:
+    - atlas.bin holds the pixels of every baked surface back to back, as BGRA
+      (the same layout convert_alpha gives us), so we can memory-map it and hand
+      the pixels straight to pygame.image.frombuffer without decoding any PNGs
+    - atlas.json is the index: where each surface starts, its size, the tiles
+      cut out of it, the native size of every source image and a hash of every
+      source file, so changing an image makes the atlas stale
+
+    Surfaces are looked up with the same keys the AssetManager uses."""
+
+    version = 1
+    pixel_format = "BGRA"
+
+    def __init__(self, directory, sources):
+        self.directory = directory
+        self.sources = list(sources)
+        self.index_path = os.path.join(directory, "atlas.json")
+        self.data_path = os.path.join(directory, "atlas.bin")
+
+        self.entries = {}
+        self.source_sizes = {}
+        self.file = None
+        self.data = None
+
+    def source_hashes(self):
+        hashes = {}
+        for path in self.sources:
+            with open(path, "rb") as source:
+                hashes[path] = hashlib.sha1(source.read()).hexdigest()
+        return hashes
+
+    def load(self):
+        """Maps the atlas into memory, returns False if it's missing or out of date"""
+        try:
+            with open(self.index_path) as index_file:
+                index = json.load(index_file)
+        except (OSError, ValueError):
+            return False
+
+        if index.get("version") != self.version or index.get("sources") != self.source_hashes():
+            return False
+
+        self.close()
+        try:
+            self.file = open(self.data_path, "rb")
+            if os.path.getsize(self.data_path) != index["length"]:
+                raise ValueError("atlas.bin doesn't match its index")
+            # Copy on write: reading is still straight from the file, but drawing on one of
+            # our surfaces gets its own private pages instead of crashing on read-only memory
+            self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_COPY) if index["length"] else b""
+        except (OSError, ValueError):
+            self.close()
+            return False
+
+        self.entries = index["entries"]
+        self.source_sizes = {path: tuple(size) for path, size in index["source_sizes"].items()}
+        return True
+
+    def close(self):
+        self.entries = {}
+        # Surfaces made from the map keep it alive, so just drop our references
+        self.data = None
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+    def lookup(self, key):
+        """A surface (or list of tiles) for an AssetManager key, None if we didn't bake it"""
+        entry = self.entries.get(repr(key))
+        if entry is None or self.data is None:
+            return None
+
+        width, height = entry["size"]
+        pixels = memoryview(self.data)[entry["offset"]:entry["offset"] + width * height * 4]
+        surface = pygame.image.frombuffer(pixels, (width, height), self.pixel_format)
+
+        if entry["tiles"] is not None:
+            return [surface.subsurface(pygame.Rect(rect)) for rect in entry["tiles"]]
+        if not entry["alpha"]:
+            # Opaque images blit faster without an alpha channel, this is a copy but no decoding
+            return surface.convert()
+        return surface
+
+    def source_size(self, path):
+        return self.source_sizes.get(path)
+
+    def save(self, records, source_sizes):
+        """Writes an atlas from (key, surface or tiles) records, as recorded by the AssetManager"""
+        os.makedirs(self.directory, exist_ok=True)
+
+        entries = {}
+        offset = 0
+        data_tmp = self.data_path + ".tmp"
+        with open(data_tmp, "wb") as data:
+            for key, asset in records:
+                if isinstance(asset, list):
+                    # Tiles all share their sheet, save the sheet once and where each tile is
+                    sheet = asset[0].get_parent()
+                    tiles = [list(tile.get_offset()) + list(tile.get_size()) for tile in asset]
+                    alpha = True
+                else:
+                    sheet = asset
+                    tiles = None
+                    alpha = key[4]
+
+                pixels = pygame.image.tobytes(sheet, self.pixel_format)
+                data.write(pixels)
+                entries[repr(key)] = {
+                    "offset": offset,
+                    "size": list(sheet.get_size()),
+                    "tiles": tiles,
+                    "alpha": alpha,
+                }
+                offset += len(pixels)
+
+        index = {
+            "version": self.version,
+            "sources": self.source_hashes(),
+            "source_sizes": {path: list(size) for path, size in source_sizes.items()},
+            "length": offset,
+            "entries": entries,
+        }
+        index_tmp = self.index_path + ".tmp"
+        with open(index_tmp, "w") as index_file:
+            json.dump(index, index_file)
+
+        # Swap the new files in, whatever is still mapped keeps reading the old ones
+        self.close()
+        os.replace(data_tmp, self.data_path)
+        os.replace(index_tmp, self.index_path)
@@ -0,0 +1,106 @@
+import numpy as np
+import pygame
+
+
+class AudioEngine:
+    """Plays the game's sound effects with as little delay as we can get.
+
+    - Every effect is made into a pygame.mixer.Sound when we load, so playing
+      one never decodes or allocates anything
+    - The mixer runs with a small buffer, a few ms, so a sound starts playing
+      on the frame it was asked for
+    - We reserve a fixed pool of channels and pick from them ourselves, when
+      they're all busy the sound that's been playing longest gets cut off
+
+    If there's no audio device the engine just stays quiet."""
+
+    def __init__(self, voices=8, frequency=44100, buffer=256):
+        self.voices = voices
+        self.frequency = frequency
+        self.buffer = buffer
+
+        self.loaded = False
+        self.sounds = {}
+        self.channels = []
+        # When each channel started its current sound, in plays, so we know who to steal from
+        self.started = []
+
+        self.plays = 0
+        self.steals = 0
+
+    def load(self):
+        """Opens the mixer and makes every effect, returns False if there's no audio"""
+        try:
+            pygame.mixer.init(self.frequency, -16, 2, self.buffer)
+        except pygame.error:
+            return False
+
+        pygame.mixer.set_num_channels(self.voices)
+        pygame.mixer.set_reserved(self.voices)
+        self.channels = [pygame.mixer.Channel(i) for i in range(self.voices)]
+        self.started = [0] * self.voices
+
+        # Short blips, made from tones so there are no files to decode
+        self.sounds = {
+            "right": self.tones([(660, 0.06), (880, 0.09)], 0.5),
+            "wrong": self.tones([(150, 0.18)], 0.4, square=True),
+            "miss": self.tones([(440, 0.05), (330, 0.05), (220, 0.08)], 0.4),
+            "move": self.tones([(1200, 0.025)], 0.25),
+            "select": self.tones([(880, 0.03), (1320, 0.05)], 0.3),
+        }
+        self.loaded = True
+        return True
+
+    def tones(self, notes, volume, square=False):
+        """A Sound playing each (frequency, seconds) note in turn, faded in and out so it doesn't click"""
+        frequency, _, channels = pygame.mixer.get_init()
+        parts = []
+        for note, seconds in notes:
+            length = int(frequency * seconds)
+            fade = max(1, min(length // 4, frequency // 200))
+            i = np.arange(length)
+            wave = np.sin(2 * np.pi * note * i / frequency)
+            if square:
+                wave = np.where(wave >= 0, 1.0, -1.0)
+            envelope = np.minimum(1.0, np.minimum(i / fade, (length - i) / fade))
+            parts.append((32767 * volume * envelope * wave).astype(np.int16))
+
+        # The same samples on every channel, interleaved
+        samples = np.repeat(np.concatenate(parts), channels)
+        return pygame.mixer.Sound(buffer=samples.tobytes())
+
+    def play(self, name):
+        """Starts an effect on a free channel, or on the one that's been playing longest"""
+        if not self.loaded:
+            return
+
+        self.plays += 1
+        channels = self.channels
+        voice = -1
+        for i in range(self.voices):
+            if not channels[i].get_busy():
+                voice = i
+                break
+
+        if voice < 0:
+            # Every voice is busy, cut off the oldest
+            voice = 0
+            for i in range(1, self.voices):
+                if self.started[i] < self.started[voice]:
+                    voice = i
+            self.steals += 1
+
+        self.started[voice] = self.plays
+        channels[voice].play(self.sounds[name])
+
+    def close(self):
+        if self.loaded:
+            pygame.mixer.quit()
+            self.loaded = False
+
+    def stats(self):
+        return {"plays": self.plays, "steals": self.steals, "voices": self.voices, "loaded": self.loaded}
+
+
+# One engine for the whole process, anything can play a sound without being handed it
+audio = AudioEngine()
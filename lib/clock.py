@@ -0,0 +1,48 @@
+import pygame
+
+
+class WallClock:
+    """Real time, paced to the frame rate. What the game normally runs on."""
+
+    def __init__(self):
+        self.clock = pygame.time.Clock()
+        self.ticks = 0
+
+    def reset(self):
+        """Starts counting the next frame from now, without counting the time until now"""
+        self.clock.tick()
+
+    def tick(self, fps=0):
+        """Waits so we run at most fps frames a second and returns the milliseconds since the last tick"""
+        step = self.clock.tick(fps)
+        self.ticks += step
+        return step
+
+    def get_ticks(self):
+        """Milliseconds as of the start of this frame.
+
+        Only counting what tick() hands out means a recording of the ticks is
+        enough to replay the game's timers exactly."""
+        return self.ticks
+
+
+class SimulatedClock:
+    """Time that only moves when we tick, by exactly one frame each time.
+
+    Nothing ever waits, so headless runs go as fast as the machine can manage
+    and always see the same times."""
+
+    def __init__(self, fps=60):
+        self.fps = fps
+        self.ticks = 0.0
+
+    def reset(self):
+        pass
+
+    def tick(self, fps=0):
+        step = 1000.0 / (fps or self.fps)
+        self.ticks += step
+        return step
+
+    def get_ticks(self):
+        return int(self.ticks)
@@ -0,0 +1,59 @@
+class Registry:
+    """Every entity in a state and the components they're made of.
+
+    An entity is just a number. Each component type gets its own index of
+    {entity: component}, so a system asks for the components it works on and
+    only ever sees the entities that have them, instead of checking every
+    entity for the keys it needs."""
+
+    def __init__(self):
+        self.next_entity = 0
+        self.indexes = {}
+        self.names = {}
+
+    def create(self, *components, name=None):
+        """A new entity made of components, name lets systems find it with named()"""
+        entity = self.next_entity
+        self.next_entity += 1
+
+        for component in components:
+            self.add(entity, component)
+        if name is not None:
+            self.names[name] = entity
+        return entity
+
+    def destroy(self, entity):
+        for index in self.indexes.values():
+            index.pop(entity, None)
+        self.names = {name: other for name, other in self.names.items() if other != entity}
+
+    def add(self, entity, component):
+        """Gives entity a component, replacing any it had of the same type"""
+        self.view(type(component))[entity] = component
+
+    def remove(self, entity, component_type):
+        self.view(component_type).pop(entity, None)
+
+    def get(self, entity, component_type):
+        """The entity's component of component_type, None if it hasn't got one"""
+        return self.view(component_type).get(entity)
+
+    def named(self, name):
+        return self.names[name]
+
+    def view(self, component_type):
+        """{entity: component} for everything with a component_type, in the order they got it"""
+        index = self.indexes.get(component_type)
+        if index is None:
+            index = self.indexes[component_type] = {}
+        return index
+
+    def query(self, *component_types):
+        """(entity, component, ...) for every entity that has all of component_types"""
+        indexes = [self.view(component_type) for component_type in component_types]
+
+        # Only the entities in the smallest index can have everything
+        for entity in min(indexes, key=len):
+            components = [index.get(entity) for index in indexes]
+            if None not in components:
+                yield (entity, *components)
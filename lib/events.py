@@ -0,0 +1,54 @@
+import pygame
+
+# What a handler can be registered for on top of the event type
+KEY_ATTRIBUTES = {
+    pygame.KEYDOWN: "key",
+    pygame.KEYUP: "key",
+    pygame.MOUSEBUTTONDOWN: "button",
+    pygame.MOUSEBUTTONUP: "button",
+}
+
+
+class EventBus:
+    """Hands each event straight to the handlers that want it.
+
+    Handlers are registered by event type, and optionally by key (or mouse
+    button), so nobody has to loop over every event checking its type. A key's
+    own handlers come first, handlers registered with no key only get the
+    keys nobody else has claimed."""
+
+    def __init__(self):
+        # {event type: {key or None: [handlers]}}
+        self.handlers = {}
+
+    def on(self, event_type, handler, key=None):
+        by_key = self.handlers.setdefault(event_type, {})
+        by_key.setdefault(key, []).append(handler)
+
+    def off(self, event_type, handler, key=None):
+        by_key = self.handlers.get(event_type, {})
+        if handler in by_key.get(key, ()):
+            by_key[key].remove(handler)
+            if not by_key[key]:
+                del by_key[key]
+            if not by_key:
+                del self.handlers[event_type]
+
+    def types(self):
+        """Every event type somebody is listening for"""
+        return set(self.handlers)
+
+    def dispatch(self, events, *args):
+        """Calls handler(event, *args) for every event somebody is listening for"""
+        for event in events:
+            by_key = self.handlers.get(event.type)
+            if by_key is None:
+                continue
+
+            attribute = KEY_ATTRIBUTES.get(event.type)
+            handlers = by_key.get(getattr(event, attribute)) if attribute else None
+            if handlers is None:
+                handlers = by_key.get(None, ())
+
+            for handler in handlers:
+                handler(event, *args)
@@ -1,8 +1,15 @@
-import pygame, sys, platform, os
+import pygame, sys, platform, os, random, threading, time
 
-from game.game import GameState
+from lib.clock import WallClock, SimulatedClock
+from lib.events import EventBus
+from lib.input import LiveInput
+from lib.assets import assets
+from lib.audio import audio
 from lib.menu import MenuState
-from leaderboard.leaderboard import LeaderboardState
+from lib.startup import startup
+from lib.trace import tracer
+
+# The game and the leaderboard (and numpy with them) only get imported when we first need them
 
 class Framework:
     """The core state of our app."""
@@ -11,62 +18,313 @@ class Framework:
     
     dimensions = (1360, 765)
 
+    # How many frames a second we draw at most
     fps = 60
+    # How many times a second the game logic runs, whatever the frame rate is
+    tick_rate = 60
+    # Don't try to catch up on more than this many ticks in one frame
+    max_ticks_per_frame = 5
+    # The longest an idle screen sleeps for before drawing again anyway
+    idle_wait = 1.0
     running = True
-    clock = pygame.time.Clock()
 
-    def __init__(self):
-        # Initialise pygame
-        pygame.init()
-        pygame.font.init()
-        pygame.mixer.init()
-        pygame.display.set_caption(self.caption)
-        self.screen = pygame.display.set_mode(self.dimensions, pygame.HWSURFACE | pygame.DOUBLEBUF | pygame.RESIZABLE)
+    # How many pieces of trash fall at the same time, more than one is rush mode
+    trash_count = 1
+    # How long a game lasts, in seconds
+    round_time = 20
+
+    background_colour = (77, 140, 242)
+
+    # Where every finished game gets saved
+    leaderboard_path = 'scores.jsonl'
+    # Where to save the frame timings when we quit, if anywhere
+    trace_path = None
+
+    def __init__(self, dirty_rects=False, headless=False, seed=None, clock=None, input=None, sound=True):
+        # Headless runs have no window, no sound and no waiting around
+        self.headless = headless
+        if headless:
+            os.environ["SDL_VIDEODRIVER"] = "dummy"
+            os.environ["SDL_AUDIODRIVER"] = "dummy"
+
+        # Everything that needs the time or a random number asks these, so runs can be reproduced
+        self.clock = clock or (SimulatedClock(self.fps) if headless else WallClock())
+        self.random = random.Random(seed)
+        # Everything that needs the keyboard or mouse asks this, so a replay can stand in for the player
+        self.input = input or LiveInput()
+
+        # Initialise only the bits of pygame we use, the audio engine opens the mixer itself
+        with startup.phase("pygame init"):
+            pygame.display.init()
+            pygame.font.init()
+        with startup.phase("window"):
+            pygame.display.set_caption(self.caption)
+            self.screen = pygame.display.set_mode(self.dimensions, pygame.HWSURFACE | pygame.DOUBLEBUF | pygame.RESIZABLE)
+
+        if not headless:
+            with startup.phase("sprite atlas"):
+                self.load_atlas()
+
+        # Headless runs still get sound (into SDL's dummy driver), so it gets exercised too
+        if sound:
+            with startup.phase("audio"):
+                audio.load()
+
+        # Dirty-rect mode: only the regions the states report get restored and pushed to the display
+        self.dirty_rects = dirty_rects
+        self.dirty = []
+        self.previous_dirty = []
+        # What gets drawn back over old dirty regions, the flat background colour when None
+        self.background = None
+        self.full_redraw = True
+
+        # Loaded on another thread once somebody starts a game, so it's ready by game over
+        self.leaderboard_store = None
+        self.leaderboard_loader = None
+        self.leaderboard_error = None
+        self.leaderboard_view = None
+
+        # How many frames we've run
+        self.frame = 0
+        # Time that hasn't been simulated yet, and events no tick has seen yet
+        self.accumulator = 0.0
+        self.pending_events = []
+
+        # The events the framework deals with itself, every state routes its own
+        self.bus = EventBus()
+        self.bus.on(pygame.QUIT, self.on_quit)
+        self.bus.on(pygame.VIDEORESIZE, self.on_resize)
+        self.bus.on(pygame.KEYDOWN, self.on_trace_key, pygame.K_F3)
+        self.bus.on(pygame.KEYDOWN, self.on_trace_key, pygame.K_F4)
 
         # Delegate
-        self.state = MenuState(self)
+        with startup.phase("menu"):
+            self.state = MenuState(self)
+            self.listen()
+
+    def load_atlas(self):
+        """Uses the baked sprites if we have them, bakes them first if they're missing or out of date"""
+        from game.bake import make_atlas, bake
+
+        atlas = make_atlas()
+        if not atlas.load():
+            bake(atlas)
+            if not atlas.load():
+                return
+        assets.atlas = atlas
 
     def main_loop(self):
-        # Initial tick so our first tick doesn't return all the time since __init__
-        self.clock.tick()
+        self.run()
+
+        # Don't lose any scores that are still waiting to be written
+        self.close_leaderboard()
+        if self.trace_path:
+            self.export_trace(self.trace_path)
+
+        # We've stopped, close pygame, kill everything
+        audio.close()
+        pygame.display.quit()
+        if platform.system() == "Windows":
+            os.system("taskkill /f /pid "+str(os.getpid()))
+        elif platform.system() == "Linux":
+            pygame.quit()
+            sys.exit()
+
+    def run(self, frames=None):
+        """Runs frames until we're stopped, or for a number of frames"""
+        # So our first tick doesn't return all the time since __init__
+        self.clock.reset()
+
+        first_frame = True
 
         # While we haven't been stopped
         while self.running:
-            # Black-out the screen
-            self.screen.fill((77, 140, 242))
+            if frames is not None:
+                if frames <= 0:
+                    break
+                frames -= 1
+
+            # Screens where nothing is moving sleep until there's something new to draw
+            if not first_frame:
+                self.idle()
+            first_frame = False
 
             # Count how long has passed since we last did this
             dt = self.clock.tick(self.fps) / 1000.0
+            frame_start = tracer.begin()
 
             # Grab any keyboard/window events
-            events = [event for event in pygame.event.get()]
+            start = tracer.begin()
+            events = self.input.poll()
+            tracer.end("events", start)
 
-            for event in events:
-                # The user probably closed the window, let's quit
-                if event.type == pygame.QUIT:
-                    self.running = False
-                    break
-                if event.type == pygame.VIDEORESIZE:
-                    SCREENSIZE = (event.w,event.h)
-                    pygame.display.set_mode(SCREENSIZE, pygame.HWSURFACE | pygame.DOUBLEBUF | pygame.RESIZABLE)
-                    self.dimensions = SCREENSIZE
+            self.bus.dispatch(events)
+            if tracer.enabled != (frame_start is not None):
+                # Timings were just turned on or off with F3
+                frame_start = tracer.begin()
+
+            if self.headless:
+                # Nothing gets drawn, so there's nothing to clean up
+                pass
+            elif self.full_redraw or not self.dirty_rects:
+                # Black-out the screen
+                self.screen.fill(self.background_colour)
+            else:
+                # Only clean up what was drawn last frame
+                self.restore_dirty()
 
-            # Update the current state
-            self.state.update(dt, events)
+            # Run the game logic in fixed steps, however long the frame took
+            self.pending_events.extend(events)
+            tick_dt = 1.0 / self.tick_rate
+            self.accumulator = min(self.accumulator + dt, tick_dt * self.max_ticks_per_frame)
+            # A tiny bit of slack so float error doesn't make us skip a tick now and then
+            while self.accumulator >= tick_dt - 1e-9:
+                # Update the current state, only the first tick sees this frame's events
+                events, self.pending_events = self.pending_events, []
+                start = tracer.begin()
+                self.state.update(tick_dt, events)
+                tracer.end("update", start)
+                self.accumulator = max(0.0, self.accumulator - tick_dt)
+
+            # Draw the current state, alpha is how far we are between the last tick and the next
+            if not self.headless:
+                start = tracer.begin()
+                self.state.render(dt, self.accumulator / tick_dt)
+                tracer.end("render", start)
 
             # Display any rendered updates
+            start = tracer.begin()
+            self.present()
+            tracer.end("display update", start)
+
+            tracer.frame(frame_start, dt)
+            self.frame += 1
+
+    def on_quit(self, event):
+        # The user probably closed the window, let's quit
+        self.running = False
+
+    def on_resize(self, event):
+        SCREENSIZE = (event.w,event.h)
+        pygame.display.set_mode(SCREENSIZE, pygame.HWSURFACE | pygame.DOUBLEBUF | pygame.RESIZABLE)
+        self.dimensions = SCREENSIZE
+        self.full_redraw = True
+
+    def on_trace_key(self, event):
+        if event.key == pygame.K_F3:
+            # Frame timings on and off, with their overlay
+            tracer.toggle()
+        else:
+            self.export_trace()
+
+    def listen(self):
+        """Only lets the events we or the current state handle into the queue.
+
+        Everything else (mouse motion, text input, joysticks...) gets dropped by
+        SDL before it's ever queued, so noisy devices don't cost us anything"""
+        types = self.bus.types() | self.state.event_types()
+        pygame.event.set_blocked(None)
+        pygame.event.set_allowed(list(types))
+
+    def idle(self):
+        """Waits for input if the state has nothing to animate, at most until it next needs drawing"""
+        if self.headless or tracer.overlay:
+            return
+
+        timeout = self.state.idle_timeout()
+        if timeout is not None:
+            self.input.wait(min(timeout, self.idle_wait))
+
+    def export_trace(self, path=None):
+        """Saves the frame timings we have so far for chrome://tracing"""
+        path = path or "trace-{0}.json".format(time.strftime("%Y%m%d-%H%M%S"))
+        count = tracer.export(path)
+        print("Saved {0} spans to {1}".format(count, path))
+
+    def mark_dirty(self, rect):
+        """States call this with every rect they drew something dynamic on this frame"""
+        if self.dirty_rects:
+            self.dirty.append(rect)
+
+    def redraw_all(self):
+        """Wipes the screen and makes this frame push the whole window to the display"""
+        self.screen.fill(self.background_colour)
+        self.full_redraw = True
+
+    def restore_dirty(self):
+        """Draws the background back over the regions that were dirty last frame"""
+        for rect in self.previous_dirty:
+            if self.background is not None:
+                self.screen.blit(self.background, rect, rect)
+            else:
+                self.screen.fill(self.background_colour, rect)
+
+    def present(self):
+        if self.headless:
+            # There's no window to show anything on
+            pass
+        elif self.dirty_rects and not self.full_redraw:
+            # Old regions need pushing too, they've just been cleaned up
+            pygame.display.update(self.previous_dirty + self.dirty)
+        else:
             pygame.display.update()
 
-        # We've stopped, close pygame, kill everything
-        pygame.display.quit()
-        if platform.system() == "Windows":
-            os.system("taskkill /f /pid "+str(os.getpid()))
-        elif platform.system() == "Linux":
-            pygame.quit()
-            sys.exit()
+        self.previous_dirty = self.dirty
+        self.dirty = []
+        self.full_redraw = False
+
+    def load_leaderboard(self):
+        """Starts reading the leaderboard's journal on another thread, so game over never waits on the disk"""
+        if self.leaderboard_loader is not None or self.leaderboard_store is not None:
+            return
+
+        from leaderboard.store import LeaderboardStore
+        # Headless runs shouldn't fill the real leaderboard up
+        path = None if self.headless else self.leaderboard_path
+
+        def load():
+            try:
+                self.leaderboard_store = LeaderboardStore(path)
+            except Exception as error:
+                # Handed over when somebody asks for the store
+                self.leaderboard_error = error
+
+        self.leaderboard_loader = threading.Thread(target=load, name="LeaderboardLoader", daemon=True)
+        self.leaderboard_loader.start()
+
+    def get_leaderboard_store(self):
+        self.load_leaderboard()
+        if self.leaderboard_loader is not None:
+            # A round is long enough that this is almost always done already
+            self.leaderboard_loader.join()
+        if self.leaderboard_error is not None:
+            raise self.leaderboard_error
+        return self.leaderboard_store
+
+    def close_leaderboard(self):
+        if self.leaderboard_loader is not None:
+            self.leaderboard_loader.join()
+        if self.leaderboard_store is not None:
+            self.leaderboard_store.close()
+
+    def enter_menu(self):
+        self.state = MenuState(self)
+        self.background = None
+        self.full_redraw = True
+        self.listen()
 
     def enter_game(self, name, gender):
+        from game.game import GameState
         self.state = GameState(self, name, gender)
+        # The store's ready by the time this game's over
+        self.load_leaderboard()
+        self.background = None
+        self.full_redraw = True
+        self.listen()
 
     def enter_leaderboard(self, user: dict, score: dict):
-        self.state = LeaderboardState(self, user, score)
\ No newline at end of file
+        from leaderboard.leaderboard import LeaderboardState
+        self.state = LeaderboardState(self, user, score)
+        self.background = None
+        self.full_redraw = True
+        self.listen()
\ No newline at end of file
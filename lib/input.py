@@ -0,0 +1,43 @@
+import pygame
+
+
+class LiveInput:
+    """What the player is doing, read from pygame once per frame.
+
+    The framework polls this at the start of every frame, and everything else
+    reads the same snapshot of the keyboard and mouse for the rest of the frame
+    instead of asking pygame itself. That keeps every tick in a frame seeing
+    the same thing and lets a replay stand in for the player."""
+
+    def __init__(self):
+        self.pressed = None
+        self.mouse_pos = (0, 0)
+        self.mods = 0
+        # What woke us up from wait(), it's still this frame's news
+        self.waiting = []
+
+    def wait(self, timeout):
+        """Sleeps until something happens or timeout seconds pass, without using any CPU"""
+        event = pygame.event.wait(max(1, int(timeout * 1000)))
+        if event.type != pygame.NOEVENT:
+            self.waiting.append(event)
+
+    def poll(self):
+        """This frame's events, and takes a new snapshot of the keyboard and mouse"""
+        events = self.waiting + pygame.event.get()
+        self.waiting = []
+        self.pressed = pygame.key.get_pressed()
+        self.mouse_pos = pygame.mouse.get_pos()
+        self.mods = pygame.key.get_mods()
+        return events
+
+    def get_pressed(self):
+        if self.pressed is None:
+            self.pressed = pygame.key.get_pressed()
+        return self.pressed
+
+    def get_mouse_pos(self):
+        return self.mouse_pos
+
+    def get_mods(self):
+        return self.mods
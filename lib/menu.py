@@ -4,6 +4,11 @@ import time, math
 from enum import Enum
 from string import printable
 
+from lib.assets import assets
+from lib.audio import audio
+from lib.events import EventBus
+from lib.textcache import text_cache
+
 class MenuStates(Enum):
     """Where we can be in the menu system."""
     PLAY = 0,
@@ -18,38 +23,51 @@ class MenuState:
         self.framework = framework
         self.screen = framework.screen
         self.current_state = MenuStates.MAIN_MENU
+        self.drawn_state = None
         self.font_path = 'assets/fonts/nyala.ttf'
 
-        self.fonts = {
-            'small': pygame.font.Font(self.font_path, 35),
-            'normal': pygame.font.Font(self.font_path, 55),
-            'large': pygame.font.Font(self.font_path, 75),
-            'heading': pygame.font.Font(self.font_path, 95),
+        # Fonts get opened the first time a screen asks for them
+        self.font_sizes = {
+            'small': 35,
+            'normal': 55,
+            'large': 75,
+            'heading': 95,
         }
+        self.fonts = {}
 
-        self.structure = {
-            MenuStates.MAIN_MENU: MenuItem(self, {
+        # Screens get made the first time we go to them
+        self.screens = {
+            MenuStates.MAIN_MENU: lambda: MenuItem(self, {
                 "Play": MenuStates.CHAR_SETUP,
                 "Help": MenuStates.HELP,
                 "Quit": MenuStates.QUIT
             }),
-            MenuStates.CHAR_SETUP: CharSetupMenuItem(self, {
+            MenuStates.CHAR_SETUP: lambda: CharSetupMenuItem(self, {
                 "Name": None,
                 "Gender": None,
                 "Start Game": None,
                 "Back": MenuStates.MAIN_MENU,
             }),
-            MenuStates.HELP: HelpMenuItem(self, {
+            MenuStates.HELP: lambda: HelpMenuItem(self, {
                 "Back": MenuStates.MAIN_MENU
             }),
             MenuStates.PLAY: None,
             MenuStates.QUIT: None,
         }
+        self.structure = {}
+
+    def get_font(self, name):
+        if name not in self.fonts:
+            self.fonts[name] = assets.font(self.font_path, self.font_sizes[name])
+        return self.fonts[name]
 
     def get_current(self):
-        return self.structure[self.current_state]
+        return self.get_screen_data(self.current_state)
 
     def get_screen_data(self, state: MenuStates):
+        if state not in self.structure:
+            make_screen = self.screens[state]
+            self.structure[state] = make_screen() if make_screen else None
         return self.structure[state]
 
     def update(self, dt: float, events: list):
@@ -61,8 +79,30 @@ class MenuState:
             pygame.event.post(pygame.event.Event(pygame.QUIT, {}))
 
         if self.get_current():
-            self.get_current().render()
+            shown = self.current_state
             self.get_current().update(dt, events)
+            if self.current_state != shown:
+                # The next screen might want different events
+                self.framework.listen()
+
+    def event_types(self):
+        current = self.get_current()
+        return current.bus.types() if current else set()
+
+    def idle_timeout(self):
+        """Seconds until we need drawing again if nothing happens, None to draw every frame"""
+        if self.current_state in (MenuStates.PLAY, MenuStates.QUIT):
+            return None
+        return self.get_current().idle_timeout()
+
+    def render(self, dt: float, alpha: float):
+        if self.current_state != self.drawn_state:
+            # A different screen, nothing from the last one should stay around
+            self.framework.redraw_all()
+            self.drawn_state = self.current_state
+
+        if self.get_current():
+            self.get_current().render()
 
 class MenuItem:
     def __init__(self, menu_state: MenuState, options={}):
@@ -70,27 +110,50 @@ class MenuItem:
         self.screen = menu_state.screen
 
         self.options = options
+        # Picking an option needs these by position, so only work them out once
+        self.option_keys = list(options.keys())
+        self.option_values = list(options.values())
         self.options_shift = (55, 55)
         self.selected_option = 0
 
-        self.font = self.menu_state.fonts['normal']
-        self.info_font = self.menu_state.fonts['small']
-        self.header_font = self.menu_state.fonts['heading']
+        self.font = self.menu_state.get_font('normal')
+
+        self.logo_path = 'assets/images/logo.fw.png'
 
-        self.logosurf = pygame.image.load('assets/images/logo.fw.png')
+        # Keys go straight to what they do
+        self.bus = EventBus()
+        self.bus.on(pygame.KEYDOWN, self.on_up, pygame.locals.K_UP)
+        self.bus.on(pygame.KEYDOWN, self.on_down, pygame.locals.K_DOWN)
+        self.bus.on(pygame.KEYDOWN, self.on_return, pygame.locals.K_RETURN)
+
+    @property
+    def info_font(self):
+        return self.menu_state.get_font('small')
+
+    @property
+    def header_font(self):
+        return self.menu_state.get_font('heading')
 
     def update(self, dt, events) -> None:
-        for event in events:
-            if event.type == pygame.KEYDOWN:
-                if event.key == pygame.locals.K_UP:
-                    self.selected_option -= 1
-                    self.selected_option %= len(self.options)
-                elif event.key == pygame.locals.K_DOWN:
-                    self.selected_option += 1
-                    self.selected_option %= len(self.options)
-                elif event.key == pygame.locals.K_RETURN:
-                    option_values = list(self.options.values())
-                    self.menu_state.current_state = option_values[self.selected_option] or MenuStates.MAIN_MENU
+        self.bus.dispatch(events)
+
+    def on_up(self, event):
+        self.selected_option -= 1
+        self.selected_option %= len(self.options)
+        audio.play("move")
+
+    def on_down(self, event):
+        self.selected_option += 1
+        self.selected_option %= len(self.options)
+        audio.play("move")
+
+    def on_return(self, event):
+        audio.play("select")
+        self.menu_state.current_state = self.option_values[self.selected_option] or MenuStates.MAIN_MENU
+
+    def idle_timeout(self):
+        # Nothing moves, we only change when a key gets pressed
+        return math.inf
 
     def get_screen_centre(self):
         return pygame.Vector2(
@@ -101,7 +164,12 @@ class MenuItem:
     def aspect_scale(self,img,bx,by):
         """ Scales 'img' to fit into box bx/by.
         This method will retain the original image's aspect ratio """
-        ix,iy = img.get_size()
+        return pygame.transform.smoothscale(img, self.aspect_size(img.get_size(), bx, by))
+
+    @staticmethod
+    def aspect_size(size,bx,by):
+        """ Returns the biggest size with the aspect ratio of 'size' that fits into box bx/by """
+        ix,iy = size
         if ix > iy:
             # fit to width
             scale_factor = bx/float(ix)
@@ -123,20 +191,32 @@ class MenuItem:
             else:
                 sy = by
 
-        return pygame.transform.smoothscale(img, (int(sx),int(sy)))
+        return (int(sx),int(sy))
+
+    def get_logo(self):
+        """The logo scaled to half the screen, shared through the asset manager"""
+        size = self.aspect_size(assets.image_size(self.logo_path),int(self.screen.get_rect().width/2),self.screen.get_rect().height)
+        return assets.scaled(self.logo_path, size, smooth=True)
+
+    def render_logo(self):
+        """The logo never changes, so with dirty rects it only gets drawn when the whole screen is"""
+        framework = self.menu_state.framework
+        if framework.dirty_rects and not framework.full_redraw:
+            return
+        logo = self.get_logo()
+        self.screen.blit(logo,(self.screen.get_rect().width/2 - logo.get_rect().width/2,self.screen.get_rect().height/4 - logo.get_rect().height/2))
 
     def render(self) -> None:
         self.render_options(self.font, (
             self.get_screen_centre()[0] - self.options_shift[0],
             self.get_screen_centre()[1] - self.options_shift[1]
         ))
-        logo = self.aspect_scale(self.logosurf,int(self.screen.get_rect().width/2),self.screen.get_rect().height)
-        self.screen.blit(logo,(self.screen.get_rect().width/2 - logo.get_rect().width/2,self.screen.get_rect().height/4 - logo.get_rect().height/2))
+        self.render_logo()
 
 
     def render_text(self, font, text, pos=(0, 0), colour=(255, 255, 255)):
-        rendered_text_surface = font.render(text, False, colour)
-        self.screen.blit(rendered_text_surface, pos)
+        rendered_text_surface = text_cache.render(font, text, False, colour)
+        self.menu_state.framework.mark_dirty(self.screen.blit(rendered_text_surface, pos))
 
     def render_options(self, font, offset=(0, 0)):
         for index, value in enumerate(self.options.keys()):
@@ -152,49 +232,56 @@ class CharSetupMenuItem(MenuItem):
         super().__init__(menu_state, options)
         self.options_shift = (100, -200)
         self.char_name = ""
+        # The caret blinks with the game clock, ticker goes 0 to 100 every blink
         self.ticker = 0
+        self.blink_rate = 0.12
         self.char_name_max = 15
         self.gender_options = ("Boy", "Girl")
         self.gender_choice = 0
 
+        # Left and right pick the gender, any other key types the name
+        self.bus.on(pygame.KEYDOWN, self.on_gender_key, pygame.locals.K_LEFT)
+        self.bus.on(pygame.KEYDOWN, self.on_gender_key, pygame.locals.K_RIGHT)
+        self.bus.on(pygame.KEYDOWN, self.on_name_key)
+
+    def on_return(self, event):
+        audio.play("select")
+        if self.option_values[self.selected_option] is not None:
+            self.menu_state.current_state = self.option_values[self.selected_option] or MenuStates.MAIN_MENU
+        elif self.option_keys[self.selected_option] == "Start Game":
+            if len(self.char_name) != 0:
+                self.menu_state.current_state = MenuStates.PLAY
+
+    def on_gender_key(self, event):
+        if self.option_keys[self.selected_option] == "Gender":
+            self.gender_choice += 1 if event.key == pygame.locals.K_RIGHT else -1
+            self.gender_choice %= len(self.gender_options)
+            audio.play("move")
+
+    def on_name_key(self, event):
+        if self.option_keys[self.selected_option] != "Name":
+            return
+
+        if event.key == pygame.locals.K_BACKSPACE:
+            self.char_name = self.char_name[:-1]
+        elif event.key < 123 and event.key != 13 and len(self.char_name) < self.char_name_max:
+            char_new = chr(event.key)
+            if char_new in printable:
+                if self.menu_state.framework.input.get_mods() & pygame.KMOD_LSHIFT:
+                    self.char_name += char_new.upper()
+                else:
+                    self.char_name += char_new
+
     def update(self, dt, events) -> None:
         """Update values for the character setup menu page"""
-        option_values = list(self.options.values())
-        option_keys = list(self.options.keys())
-        for event in events:
-            if event.type == pygame.KEYDOWN:
-                if event.key == pygame.locals.K_UP:
-                    self.selected_option -= 1
-                    self.selected_option %= len(self.options)
-                elif event.key == pygame.locals.K_DOWN:
-                    self.selected_option += 1
-                    self.selected_option %= len(self.options)
-                elif event.key == pygame.locals.K_RETURN:
-                    if option_values[self.selected_option] is not None:
-                        self.menu_state.current_state = option_values[self.selected_option] or MenuStates.MAIN_MENU
-                    elif option_keys[self.selected_option] == "Start Game":
-                        if len(self.char_name) != 0:
-                            self.menu_state.current_state = MenuStates.PLAY
-                elif option_keys[self.selected_option] == "Name":
-                    if event.key == pygame.locals.K_BACKSPACE:
-                        self.char_name = self.char_name[:-1]
-                    elif event.key < 123 and event.key != 13 and len(self.char_name) < self.char_name_max:
-                        char_new = chr(event.key)
-                        if char_new in printable:
-                            if pygame.key.get_mods() & pygame.KMOD_LSHIFT:
-                                self.char_name += char_new.upper()
-                            else:
-                                self.char_name += char_new
-                elif option_keys[self.selected_option] == "Gender":
-                    if event.key == pygame.locals.K_RIGHT:
-                        self.gender_choice += 1
-                    elif event.key == pygame.locals.K_LEFT:
-                        self.gender_choice -= 1
+        self.bus.dispatch(events)
+        self.ticker = self.menu_state.framework.clock.get_ticks() * self.blink_rate % 100
 
-            self.gender_choice %= len(self.gender_options)
-
-        self.ticker += 2
-        self.ticker %= 100
+    def idle_timeout(self):
+        if self.selected_option != 0:
+            return math.inf
+        # Wake up when the caret next turns on or off
+        return (50 - self.ticker % 50) / self.blink_rate / 1000
 
     def render(self) -> None:
         font = self.font
@@ -222,8 +309,7 @@ class CharSetupMenuItem(MenuItem):
                 text = "> {0}".format(text)
 
             self.render_text(font, text, (index + offset[0], index * 55 + offset[1]))
-        logo = self.aspect_scale(self.logosurf,int(self.screen.get_rect().width/2),self.screen.get_rect().height)
-        self.screen.blit(logo,(self.screen.get_rect().width/2 - logo.get_rect().width/2,self.screen.get_rect().height/4 - logo.get_rect().height/2))
+        self.render_logo()
 
 
 class HelpMenuItem(MenuItem):
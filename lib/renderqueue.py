@@ -0,0 +1,74 @@
+import pygame
+
+
+class RenderQueue:
+    """Everything to draw this frame, drawn in one go.
+
+    Systems submit (surface, dest, area) commands onto layers instead of
+    blitting them. flush() draws the layers lowest first with one
+    Surface.blits call, so there's one Python call to pygame however many
+    sprites there are. Commands that are completely off the screen get
+    dropped when they're submitted, and when track_dirty is on we remember
+    where everything dynamic went for dirty-rect mode."""
+
+    def __init__(self, screen, track_dirty=False):
+        self.screen = screen
+        self.track_dirty = track_dirty
+        self.layers = {}
+        self.dirty = []
+        self.width, self.height = screen.get_size()
+
+        # How many commands were drawn and thrown away last flush
+        self.drawn = 0
+        self.culled = 0
+
+    def begin(self, track_dirty=None):
+        """Starts a new frame, the screen might have changed size since the last one"""
+        if track_dirty is not None:
+            self.track_dirty = track_dirty
+        self.width, self.height = self.screen.get_size()
+        for commands in self.layers.values():
+            commands.clear()
+        self.dirty = []
+        self.culled = 0
+
+    def submit(self, surface, dest, layer=0, area=None, dirty=True):
+        """Queues surface to be drawn at dest, only the area part of it if given"""
+        x, y = dest
+        if area is None:
+            width, height = surface.get_size()
+        else:
+            width, height = area[2], area[3]
+
+        if x >= self.width or y >= self.height or x + width <= 0 or y + height <= 0:
+            self.culled += 1
+            return
+
+        commands = self.layers.get(layer)
+        if commands is None:
+            commands = self.layers[layer] = []
+        commands.append((surface, dest) if area is None else (surface, dest, area))
+
+        if dirty and self.track_dirty:
+            self.dirty.append(pygame.Rect(x, y, width, height))
+
+    def extend(self, commands, size, layer=0, dirty=True):
+        """Queues lots of (surface, dest) commands that are all size big and already known to be on screen"""
+        queued = self.layers.get(layer)
+        if queued is None:
+            queued = self.layers[layer] = []
+        queued.extend(commands)
+
+        if dirty and self.track_dirty:
+            width, height = size
+            self.dirty.extend(pygame.Rect(dest[0], dest[1], width, height) for _, dest in commands)
+
+    def flush(self):
+        """Draws everything, lowest layer first, and returns the dirty rects"""
+        commands = []
+        for layer in sorted(self.layers):
+            commands.extend(self.layers[layer])
+
+        self.screen.blits(commands, doreturn=False)
+        self.drawn = len(commands)
+        return self.dirty
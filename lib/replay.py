@@ -0,0 +1,198 @@
+import gzip
+import struct
+import pygame
+
+
+# File header: magic, version, seed, tick rate, trash count
+HEADER = struct.Struct("<4sHqHH")
+# Each frame: dt in ms, mouse x and y, modifier keys, how many keys are held, how many events
+FRAME = struct.Struct("<dhhHHH")
+KEY_EVENT = struct.Struct("<iHHB")
+MOUSE_EVENT = struct.Struct("<Bhh")
+RESIZE_EVENT = struct.Struct("<HH")
+WHEEL_EVENT = struct.Struct("<hh")
+
+MAGIC = b"EDGR"
+# Goes up whenever what gets recorded changes, so an old build never misreads a newer file
+# 2: mouse wheel events
+VERSION = 2
+
+# Only the events something in the game actually looks at get saved
+KEY_EVENTS = (pygame.KEYDOWN, pygame.KEYUP)
+MOUSE_EVENTS = (pygame.MOUSEBUTTONDOWN, pygame.MOUSEBUTTONUP)
+RECORDED_EVENTS = (pygame.QUIT, pygame.VIDEORESIZE, pygame.MOUSEWHEEL) + KEY_EVENTS + MOUSE_EVENTS
+
+
+class InputRecorder:
+    """Saves everything the player did, frame by frame, so it can be replayed exactly.
+
+    It stands in for both the framework's clock and its input, passing
+    everything through to the real ones and writing down each frame's dt, events,
+    held keys, mouse position and modifier keys as it goes. With the seed,
+    that's everything the game depends on. Files are gzipped, a minute of
+    play is only a few KB."""
+
+    def __init__(self, path, seed, tick_rate, trash_count, clock, input):
+        self.clock = clock
+        self.input = input
+        self.dt = 0.0
+        self.frames = 0
+
+        self.file = gzip.open(path, "wb")
+        self.file.write(HEADER.pack(MAGIC, VERSION, seed, tick_rate, trash_count))
+
+    def reset(self):
+        self.clock.reset()
+
+    def tick(self, fps=0):
+        # The framework always ticks before it polls, the frame gets written once we have its events
+        self.dt = self.clock.tick(fps)
+        return self.dt
+
+    def get_ticks(self):
+        return self.clock.get_ticks()
+
+    def wait(self, timeout):
+        self.input.wait(timeout)
+
+    def poll(self):
+        events = self.input.poll()
+        self.write_frame(events)
+        return events
+
+    def get_pressed(self):
+        return self.input.get_pressed()
+
+    def get_mouse_pos(self):
+        return self.input.get_mouse_pos()
+
+    def get_mods(self):
+        return self.input.get_mods()
+
+    def write_frame(self, events):
+        events = [event for event in events if event.type in RECORDED_EVENTS]
+        pressed = [code for code, down in enumerate(self.input.get_pressed()) if down]
+        mouse_x, mouse_y = self.input.get_mouse_pos()
+
+        data = [FRAME.pack(self.dt, mouse_x, mouse_y, self.input.get_mods() & 0xFFFF, len(pressed), len(events))]
+        data.append(struct.pack("<{0}H".format(len(pressed)), *pressed))
+        for event in events:
+            data.append(struct.pack("<I", event.type))
+            if event.type in KEY_EVENTS:
+                text = getattr(event, "unicode", "").encode("utf-8")[:255]
+                data.append(KEY_EVENT.pack(event.key, event.mod & 0xFFFF, event.scancode, len(text)) + text)
+            elif event.type in MOUSE_EVENTS:
+                data.append(MOUSE_EVENT.pack(event.button, *event.pos))
+            elif event.type == pygame.VIDEORESIZE:
+                data.append(RESIZE_EVENT.pack(event.w, event.h))
+            elif event.type == pygame.MOUSEWHEEL:
+                data.append(WHEEL_EVENT.pack(event.x, event.y))
+
+        self.file.write(b"".join(data))
+        self.frames += 1
+
+    def close(self):
+        if not self.file.closed:
+            self.file.close()
+
+
+class InputReplay:
+    """Plays a recording back as the framework's clock and input.
+
+    Every frame gets the dt, events and keyboard/mouse state it had when it was
+    recorded, so with the same seed the game goes exactly the same way, menus
+    and all. Nothing waits for real time, so this also makes a repeatable
+    workload for comparing frame times between builds. Once the recording runs
+    out we hand out a QUIT."""
+
+    def __init__(self, path):
+        self.file = gzip.open(path, "rb")
+        magic, version, self.seed, self.tick_rate, self.trash_count = self.read(HEADER)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("{0} isn't a replay we can play".format(path))
+
+        self.ticks = 0.0
+        self.frames = 0
+        self.finished = False
+
+        self.events = []
+        self.pressed = pygame.key.ScancodeWrapper((False,) * 512)
+        self.mouse_pos = (0, 0)
+        self.mods = 0
+
+    def read(self, layout):
+        data = self.file.read(layout.size)
+        if len(data) != layout.size:
+            raise EOFError
+        return layout.unpack(data)
+
+    def reset(self):
+        pass
+
+    def tick(self, fps=0):
+        """Loads the next frame and returns how long it took when it was recorded"""
+        try:
+            dt = self.read_frame()
+        except EOFError:
+            # Out of frames, give the game one last frame to see the QUIT in
+            self.finished = True
+            self.events = [pygame.event.Event(pygame.QUIT)]
+            dt = 1000.0 / self.tick_rate
+
+        self.ticks += dt
+        return dt
+
+    def get_ticks(self):
+        return int(self.ticks)
+
+    def wait(self, timeout):
+        # The recorded dt already has however long we slept in it
+        pass
+
+    def poll(self):
+        events, self.events = self.events, []
+        return events
+
+    def get_pressed(self):
+        return self.pressed
+
+    def get_mouse_pos(self):
+        return self.mouse_pos
+
+    def get_mods(self):
+        return self.mods
+
+    def read_frame(self):
+        dt, mouse_x, mouse_y, self.mods, pressed_count, event_count = self.read(FRAME)
+        self.mouse_pos = (mouse_x, mouse_y)
+
+        pressed = [False] * 512
+        for code in self.read(struct.Struct("<{0}H".format(pressed_count))):
+            pressed[code] = True
+        self.pressed = pygame.key.ScancodeWrapper(pressed)
+
+        self.events = []
+        for _ in range(event_count):
+            event_type, = self.read(struct.Struct("<I"))
+            if event_type in KEY_EVENTS:
+                key, mod, scancode, length = self.read(KEY_EVENT)
+                text = self.file.read(length).decode("utf-8")
+                event = pygame.event.Event(event_type, key=key, mod=mod, scancode=scancode, unicode=text)
+            elif event_type in MOUSE_EVENTS:
+                button, x, y = self.read(MOUSE_EVENT)
+                event = pygame.event.Event(event_type, button=button, pos=(x, y))
+            elif event_type == pygame.VIDEORESIZE:
+                w, h = self.read(RESIZE_EVENT)
+                event = pygame.event.Event(event_type, w=w, h=h, size=(w, h))
+            elif event_type == pygame.MOUSEWHEEL:
+                x, y = self.read(WHEEL_EVENT)
+                event = pygame.event.Event(event_type, x=x, y=y)
+            else:
+                event = pygame.event.Event(event_type)
+            self.events.append(event)
+
+        self.frames += 1
+        return dt
+
+    def close(self):
+        self.file.close()
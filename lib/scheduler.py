@@ -0,0 +1,139 @@
+import time
+
+from lib.trace import tracer
+
+
+class ScheduledSystem:
+    """Book-keeping the scheduler holds for every system."""
+
+    def __init__(self, system, rate, after):
+        self.system = system
+        self.rate = rate
+        self.after = tuple(after)
+        self.enabled = True
+
+        # Time and events waiting for the next run of a system that doesn't run every tick.
+        # Starts full so everything runs on the first tick
+        self.interval = 1.0 / rate if rate else 0
+        self.pending_dt = self.interval
+        self.pending_events = []
+
+        self.calls = 0
+        self.total_time = 0.0
+
+
+class Scheduler:
+    """Runs systems in dependency order, each one at its own rate.
+
+    Systems say how often they want to run with their rate attribute (None runs
+    them every tick) and which systems they need to run after with after."""
+
+    def __init__(self):
+        self.entries = {}
+        self.order = []
+
+    def add(self, system, rate=None, after=None):
+        """Schedules a system, rate and after default to what the system declares"""
+        entry = ScheduledSystem(
+            system,
+            rate if rate is not None else system.rate,
+            after if after is not None else system.after
+        )
+        if system.name in self.entries:
+            raise ValueError("A system called {0} is already scheduled".format(system.name))
+
+        self.entries[system.name] = entry
+        self.order = self.sort()
+        return system
+
+    def remove(self, name):
+        del self.entries[name]
+        self.order = self.sort()
+
+    def get(self, name):
+        return self.entries[name].system
+
+    def set_enabled(self, name, enabled=True):
+        entry = self.entries[name]
+        entry.enabled = enabled
+        # Don't make a system catch up on everything it missed while disabled
+        entry.pending_dt = entry.interval
+        entry.pending_events = []
+
+    def is_enabled(self, name):
+        return self.entries[name].enabled
+
+    def event_types(self):
+        """Every event type one of our systems listens for"""
+        types = set()
+        for entry in self.entries.values():
+            if entry.system.bus is not None:
+                types |= entry.system.bus.types()
+        return types
+
+    def sort(self):
+        """Orders the systems so everyone runs after their dependencies, otherwise in the order they were added"""
+        order = []
+        visiting = set()
+        done = set()
+
+        def visit(name):
+            if name in done:
+                return
+            if name in visiting:
+                raise ValueError("Systems have a circular dependency on {0}".format(name))
+
+            visiting.add(name)
+            for dependency in self.entries[name].after:
+                # Depending on a system we don't have is fine, e.g. it was removed
+                if dependency in self.entries:
+                    visit(dependency)
+            visiting.remove(name)
+
+            done.add(name)
+            order.append(self.entries[name])
+
+        for name in self.entries:
+            visit(name)
+        return order
+
+    def update(self, game, dt, events):
+        for entry in self.order:
+            if not entry.enabled:
+                continue
+
+            if entry.rate:
+                # Save everything up until it's our turn
+                entry.pending_dt += dt
+                entry.pending_events.extend(events)
+                # The same slack as the framework's ticks, so float error doesn't make us wait a tick too long
+                if entry.pending_dt < entry.interval - 1e-9:
+                    continue
+
+                # Hand over whole intervals and keep the rest, so the rate stays right on average
+                # even when it doesn't divide the tick rate
+                intervals = max(1, int((entry.pending_dt + 1e-9) // entry.interval))
+                system_dt, system_events = intervals * entry.interval, entry.pending_events
+                entry.pending_dt -= system_dt
+                entry.pending_events = []
+            else:
+                system_dt, system_events = dt, events
+
+            start = time.perf_counter()
+            entry.system.update(game, system_dt, system_events)
+            duration = time.perf_counter() - start
+            entry.total_time += duration
+            entry.calls += 1
+            tracer.add(entry.system.name, start, duration, "system")
+
+    def timings(self):
+        """Cumulative seconds and number of calls for every system, in the order they run"""
+        return {
+            entry.system.name: {"time": entry.total_time, "calls": entry.calls}
+            for entry in self.order
+        }
+
+    def reset_timings(self):
+        for entry in self.entries.values():
+            entry.total_time = 0.0
+            entry.calls = 0
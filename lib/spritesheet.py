@@ -5,4 +5,6 @@ class SpriteSheet:
         self.tiles = {}
         self.tile_size = tile_size
         self.moving = moving
-        self.scale = scale
\ No newline at end of file
+        self.scale = scale
+        # Size to scale the whole sheet to before slicing, None means by scale
+        self.sheet_size = None
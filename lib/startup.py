@@ -0,0 +1,33 @@
+import time
+
+from contextlib import contextmanager
+
+
+class StartupProfile:
+    """Times each phase of starting up, up to the first frame on screen."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.phases = []
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases.append((name, time.perf_counter() - start))
+
+    def report(self):
+        """A table of the phases, with the total time since we were created"""
+        total = time.perf_counter() - self.started
+        lines = ["Startup profile"]
+        for name, seconds in self.phases:
+            lines.append("  {0:<24} {1:8.1f} ms".format(name, seconds * 1000))
+        lines.append("  {0:<24} {1:8.1f} ms".format("other", (total - sum(seconds for _, seconds in self.phases)) * 1000))
+        lines.append("  {0:<24} {1:8.1f} ms".format("time to first frame", total * 1000))
+        return "\n".join(lines)
+
+
+# Created when this is first imported, which main.py does before anything else
+startup = StartupProfile()
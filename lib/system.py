@@ -1,9 +1,20 @@
 class System:
     """Updates our game's list of entities."""
 
+    # How many times a second the scheduler runs us, None means every tick
+    rate = None
+    # Names of the systems that have to run before us
+    after = ()
+    # An EventBus with our event handlers, if we handle any
+    bus = None
+
     def __init__(self):
         pass
 
+    @property
+    def name(self):
+        return type(self).__name__
+
     def update(self, game, dt, events):
         """Modify entities and their components based on events and their
         current state."""
@@ -0,0 +1,50 @@
+from collections import OrderedDict
+
+
+class TextCache:
+    """Keeps rendered text surfaces so a string is only rasterised when it changes.
+
+    Surfaces are keyed by (font, text, colour, antialias) and the least recently
+    used ones are thrown away once we hold more than max_size of them."""
+
+    def __init__(self, max_size=256):
+        self.max_size = max_size
+        self.surfaces = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def render(self, font, text, antialias=False, colour=(255, 255, 255)):
+        """Same as font.render(text, antialias, colour), but cached"""
+        key = (font, text, tuple(colour), antialias)
+
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.hits += 1
+            self.surfaces.move_to_end(key)
+            return surface
+
+        self.misses += 1
+        surface = font.render(text, antialias, colour)
+        self.surfaces[key] = surface
+
+        # Evict the least recently used text
+        while len(self.surfaces) > self.max_size:
+            self.surfaces.popitem(last=False)
+
+        return surface
+
+    def clear(self):
+        self.surfaces.clear()
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "size": len(self.surfaces),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+
+# Shared between the menus and the game so the same labels aren't rendered twice
+text_cache = TextCache()
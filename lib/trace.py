@@ -0,0 +1,111 @@
+import json
+import time
+
+from collections import deque
+
+
+def percentile(samples, percent):
+    """The value percent of the way through the sorted samples"""
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, int(round(percent / 100 * (len(ordered) - 1)))))
+    return ordered[index]
+
+
+class Tracer:
+    """Records how long each part of a frame takes, into ring buffers.
+
+    Code that wants timing does:
+
+        start = tracer.begin()
+        ...
+        tracer.end("name", start)
+
+    begin() returns None while we're disabled and end() gives up straight away
+    on None, so leaving the calls in costs next to nothing. Spans can be saved
+    in Chrome's trace_event format and opened in chrome://tracing or Perfetto."""
+
+    def __init__(self, capacity=50000, frames=600):
+        self.enabled = False
+        # Whether RenderSystem draws the live stats
+        self.overlay = False
+
+        self.origin = time.perf_counter()
+        # (name, category, start, duration), all in seconds
+        self.spans = deque(maxlen=capacity)
+        # How long each frame's work took and how long each whole frame was
+        self.frame_times = deque(maxlen=frames)
+        self.frame_intervals = deque(maxlen=frames)
+
+    def begin(self):
+        return time.perf_counter() if self.enabled else None
+
+    def end(self, name, start, category="frame"):
+        if start is None:
+            return
+        self.spans.append((name, category, start, time.perf_counter() - start))
+
+    def add(self, name, start, duration, category="frame"):
+        """Records a span somebody else already timed"""
+        if self.enabled:
+            self.spans.append((name, category, start, duration))
+
+    def frame(self, start, dt):
+        """Marks the end of a frame whose work began at start, dt is the whole frame"""
+        if start is None:
+            return
+        self.end("frame", start)
+        self.frame_times.append(time.perf_counter() - start)
+        self.frame_intervals.append(dt)
+
+    def toggle(self):
+        self.enabled = not self.enabled
+        self.overlay = self.enabled
+
+    def clear(self):
+        self.spans.clear()
+        self.frame_times.clear()
+        self.frame_intervals.clear()
+
+    def summary(self, top=3):
+        """Live stats for the overlay: fps, frame time percentiles (ms) and the slowest systems"""
+        intervals = sum(self.frame_intervals)
+        # The same percentiles as the replay report and the benchmarks
+        times = [duration * 1000 for duration in self.frame_times] or [0.0]
+
+        # The span buffer covers a different number of frames than frame_times, so count them
+        systems = {}
+        frames = 0
+        for name, category, _, duration in self.spans:
+            if category == "system":
+                systems[name] = systems.get(name, 0.0) + duration
+            elif name == "frame":
+                frames += 1
+        slowest = sorted(systems.items(), key=lambda item: item[1], reverse=True)[:top]
+
+        return {
+            "fps": len(self.frame_intervals) / intervals if intervals else 0.0,
+            "p50": percentile(times, 50),
+            "p95": percentile(times, 95),
+            "p99": percentile(times, 99),
+            "systems": [(name, total * 1000 / max(1, frames)) for name, total in slowest],
+        }
+
+    def export(self, path):
+        """Saves every span we have in Chrome's trace_event JSON format"""
+        events = [{
+            "name": name,
+            "cat": category,
+            "ph": "X",
+            "ts": (start - self.origin) * 1e6,
+            "dur": duration * 1e6,
+            "pid": 1,
+            "tid": 1,
+        } for name, category, start, duration in self.spans]
+
+        with open(path, "w") as trace_file:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, trace_file)
+        return len(events)
+
+
+# Shared by the framework, the schedulers and RenderSystem
+tracer = Tracer()
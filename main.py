@@ -1,4 +1,11 @@
-from lib.framework import Framework
+# Imported first, so the startup profile counts everything after this
+from lib.startup import startup
+
+import argparse, random, time
+
+with startup.phase("imports"):
+    from lib.framework import Framework
+    from lib.trace import percentile, tracer
 
 """
 If you're looking for the game's important code, look in game/game.py
@@ -11,6 +18,107 @@ A huge credit to Neontribe for the design of the game. Thanks guys :)
 """
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Earth Day 2019")
+    parser.add_argument("--dirty-rects", action="store_true",
+                        help="only redraw and push the parts of the screen that changed")
+    parser.add_argument("--headless", action="store_true",
+                        help="run the game with no window, as fast as possible")
+    parser.add_argument("--frames", type=int, default=None,
+                        help="stop after this many frames")
+    parser.add_argument("--seed", type=int, default=None,
+                        help="seed for the random numbers, for reproducible runs")
+    parser.add_argument("--rush", type=int, default=1, metavar="N",
+                        help="rush mode, N pieces of trash fall at the same time")
+    parser.add_argument("--fps", type=int, default=Framework.fps,
+                        help="most frames to draw a second")
+    parser.add_argument("--tick-rate", type=int, default=Framework.tick_rate,
+                        help="how many times a second the game logic runs")
+    parser.add_argument("--startup-profile", action="store_true",
+                        help="print how long each part of starting up took, up to the first frame")
+    parser.add_argument("--trace", metavar="JSON",
+                        help="record frame timings from the start and save them here for chrome://tracing when we quit")
+    parser.add_argument("--mute", action="store_true",
+                        help="no sound effects")
+    parser.add_argument("--record", metavar="FILE",
+                        help="save everything the player does so the game can be replayed exactly")
+    parser.add_argument("--replay", metavar="FILE",
+                        help="play a recording back as fast as possible and print the frame times")
+    args = parser.parse_args()
+    if args.record and args.headless:
+        parser.error("--record needs somebody playing, it can't be used with --headless")
+
+    recorder = replay = None
+    if args.replay:
+        # The recording decides everything the game depends on
+        from lib.replay import InputReplay
+        try:
+            replay = InputReplay(args.replay)
+        except ValueError as error:
+            # e.g. recorded by a different version of the game
+            parser.error(str(error))
+        args.seed, args.tick_rate, args.rush = replay.seed, replay.tick_rate, replay.trash_count
+        tracer.enabled = True
+    elif args.record:
+        # A replay needs to know the seed, so make one up if we weren't given one
+        from lib.clock import WallClock
+        from lib.input import LiveInput
+        from lib.replay import InputRecorder
+        if args.seed is None:
+            args.seed = random.randrange(2 ** 31)
+        recorder = InputRecorder(args.record, args.seed, args.tick_rate, args.rush, WallClock(), LiveInput())
+
     # Make a Framework based on our Game and run it!
-    app = Framework()
-    app.main_loop()
+    source = replay or recorder
+    app = Framework(dirty_rects=args.dirty_rects, headless=args.headless, seed=args.seed, clock=source, input=source,
+                    sound=not args.mute)
+    app.trash_count = args.rush
+    app.fps = args.fps
+    app.tick_rate = args.tick_rate
+    app.trace_path = args.trace
+    if args.trace:
+        tracer.enabled = True
+
+    if replay is not None:
+        # Menus and all, exactly as they were played, but not onto the real leaderboard
+        app.leaderboard_path = None
+        start = time.perf_counter()
+        app.run(args.frames)
+        elapsed = time.perf_counter() - start
+        app.close_leaderboard()
+        if args.trace:
+            app.export_trace(args.trace)
+
+        frame_times = [duration * 1000 for name, _, _, duration in tracer.spans if name == "frame"]
+        print("replayed {0} frames ({1:.2f}s of play) in {2:.3f}s".format(
+            app.frame, app.clock.get_ticks() / 1000, elapsed))
+        print("frame ms: p50 {0:.3f}, p95 {1:.3f}, p99 {2:.3f}, max {3:.3f}".format(
+            percentile(frame_times, 50), percentile(frame_times, 95), percentile(frame_times, 99), max(frame_times)))
+        if hasattr(app.state, "score"):
+            print("game over:", app.state.score)
+    elif args.headless:
+        # Nobody can go through the menus, so go straight into a game
+        app.enter_game("Headless", "Boy")
+
+        start = time.perf_counter()
+        app.run(args.frames)
+        elapsed = time.perf_counter() - start
+        app.close_leaderboard()
+        if args.trace:
+            app.export_trace(args.trace)
+
+        print("frames: {0}, simulated: {1:.2f}s, wall: {2:.3f}s".format(
+            app.frame, app.clock.get_ticks() / 1000, elapsed))
+        if hasattr(app.state, "score"):
+            print("game over:", app.state.score)
+        else:
+            print("right: {0}, wrong: {1}".format(app.state.right, app.state.wrong))
+    else:
+        if args.startup_profile:
+            with startup.phase("first frame"):
+                app.run(1)
+            print(startup.report(), flush=True)
+        if recorder is not None:
+            # main_loop never comes back, so close the recording as soon as the game stops
+            app.run()
+            recorder.close()
+        app.main_loop()
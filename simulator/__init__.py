@@ -0,0 +1,8 @@
+"""Plays lots of headless games with a bot, for tuning how hard the game is.
+
+Run it from the top of the repo (the assets are loaded with relative paths):
+
+    python -m simulator --games 2000                   # every core, perfect bot
+    python -m simulator --games 500 --mistakes 0.2     # a bot that slips up a fifth of the time
+    python -m simulator --round 120 --out games.jsonl  # longer rounds, keep every game's score
+"""
@@ -0,0 +1,113 @@
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import time
+
+# Workers never open a window or play a sound
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+# SDL turns SIGTERM into a QUIT event otherwise, and the pool can't stop its workers
+os.environ["SDL_NO_SIGNAL_HANDLERS"] = "1"
+
+from lib.framework import Framework
+from lib.trace import percentile
+from simulator.bot import BotInput, POLICIES
+
+# Each worker process keeps one framework and plays all its games on it
+worker = None
+
+
+def start_worker(policy, round_time, trash_count):
+    global worker
+    bot = BotInput(policy, random.Random())
+    # Nobody's listening, so don't spend any time mixing sound
+    worker = Framework(headless=True, input=bot, sound=False)
+    worker.round_time = round_time
+    worker.trash_count = trash_count
+    bot.framework = worker
+
+
+def play(seed):
+    """Plays one whole game and returns how it went"""
+    start = time.perf_counter()
+
+    # Everything random starts again from the seed, so any game can be played again
+    worker.random.seed(seed)
+    worker.input.random.seed(seed)
+    worker.running = True
+    worker.enter_game("Bot", "Boy")
+
+    game = worker.state
+    frames = 0
+    while worker.state is game and worker.running:
+        worker.run(1)
+        frames += 1
+
+    score = getattr(worker.state, "score", None) or {"right": game.right, "wrong": game.wrong, "percentage": "0.0"}
+    return {
+        "seed": seed,
+        "right": score["right"],
+        "wrong": score["wrong"],
+        "percentage": float(score["percentage"]),
+        "frames": frames,
+        "seconds": time.perf_counter() - start,
+    }
+
+
+def summarise(name, values):
+    return "{0:12} mean {1:8.2f}  p5 {2:8.2f}  p50 {3:8.2f}  p95 {4:8.2f}".format(
+        name, sum(values) / len(values), percentile(values, 5), percentile(values, 50), percentile(values, 95))
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m simulator", description="Play lots of headless games with a bot")
+    parser.add_argument("--games", type=int, default=1000)
+    parser.add_argument("--processes", type=int, default=os.cpu_count(), help="how many cores to use")
+    parser.add_argument("--policy", choices=sorted(POLICIES), default="steer", help="how the bot plays")
+    parser.add_argument("--mistakes", type=float, default=0.0,
+                        help="chance each tick the steer bot presses a random key instead")
+    parser.add_argument("--round", type=int, default=Framework.round_time, help="how long a game lasts, in seconds")
+    parser.add_argument("--rush", type=int, default=1, metavar="N", help="N pieces of trash at the same time")
+    parser.add_argument("--seed", type=int, default=0, help="game i is played with seed + i")
+    parser.add_argument("--out", metavar="JSONL", help="also save every game's result, one per line")
+    parser.add_argument("--progress", type=int, default=100, help="print a line every this many games")
+    args = parser.parse_args()
+
+    policy = POLICIES[args.policy](args.mistakes) if args.policy == "steer" else POLICIES[args.policy]()
+    out = open(args.out, "w") if args.out else None
+
+    results = []
+    start = time.perf_counter()
+    with multiprocessing.Pool(args.processes, start_worker, (policy, args.round, args.rush)) as pool:
+        seeds = range(args.seed, args.seed + args.games)
+        chunk = max(1, min(16, args.games // (args.processes * 4)))
+
+        # Results come back as soon as any worker finishes a game, in whatever order
+        for result in pool.imap_unordered(play, seeds, chunk):
+            results.append(result)
+            if out is not None:
+                out.write(json.dumps(result) + "\n")
+            if args.progress and len(results) % args.progress == 0:
+                elapsed = time.perf_counter() - start
+                print("{0}/{1} games, {2:.1f} games/s".format(len(results), args.games, len(results) / elapsed), flush=True)
+    elapsed = time.perf_counter() - start
+
+    if out is not None:
+        out.close()
+
+    print("\n{0} games of {1}s, {2} bot{3}, rush {4}".format(
+        len(results), args.round, args.policy, " ({0:.0%} mistakes)".format(args.mistakes) if args.mistakes else "", args.rush))
+    print(summarise("right", [result["right"] for result in results]))
+    print(summarise("wrong", [result["wrong"] for result in results]))
+    print(summarise("percentage", [result["percentage"] for result in results]))
+
+    # Per core means what one core manages on its own, which doesn't change with the machine's core count
+    busy = sum(result["seconds"] for result in results)
+    print("\n{0:.1f} games/s on {1} processes, {2:.1f} games/s per core, {3:.0f} frames/s per core".format(
+        len(results) / elapsed, args.processes, len(results) / busy, sum(result["frames"] for result in results) / busy))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+import pygame
+
+from game.components import Position
+from game.systems.userinput import UserInputSystem
+
+# The keys a bot can hold, by the scancode pygame.key.get_pressed() is indexed with
+SCANCODES = {
+    pygame.K_LEFT: pygame.KSCAN_LEFT,
+    pygame.K_RIGHT: pygame.KSCAN_RIGHT,
+    pygame.K_DOWN: pygame.KSCAN_DOWN,
+}
+
+
+class SteerPolicy:
+    """Steers the trash over the bin its category (index // 3) goes in, then drops it.
+
+    mistakes is the chance of pressing a random key instead on any tick, so
+    the bot can play about as well as a person would."""
+
+    name = "steer"
+
+    def __init__(self, mistakes=0.0):
+        self.mistakes = mistakes
+
+    def __call__(self, game, random):
+        trash = game.trash
+        if trash.count == 0:
+            return ()
+
+        if self.mistakes and random.random() < self.mistakes:
+            return (random.choice(list(SCANCODES)),)
+
+        # Everything moves together, so steer the first piece
+        sheet = game.bin_sheet
+        target = game.entities.get(game.bins[int(trash.index[0]) // 3], Position).x + sheet.tile_size[0] / 2
+        gap = target - (trash.pos[0, 0] + trash.size / 2)
+
+        # We hold the keys for a whole frame, which steers the trash for one tick or more, so
+        # anything closer than half of one frame's steering is lined up
+        framework = game.framework
+        step = UserInputSystem.steer_speed / min(framework.tick_rate, framework.fps)
+        if gap > step / 2:
+            return (pygame.K_RIGHT,)
+        if gap < -step / 2:
+            return (pygame.K_LEFT,)
+        return (pygame.K_DOWN,)
+
+
+class IdlePolicy:
+    """Never touches anything, the worst anybody can do"""
+
+    name = "idle"
+
+    def __call__(self, game, random):
+        return ()
+
+
+POLICIES = {policy.name: policy for policy in (SteerPolicy, IdlePolicy)}
+
+
+class BotInput:
+    """Stands in for the player, holding whatever keys its policy picks each frame.
+
+    It goes in the framework's input, like a replay does, so the game can't
+    tell a bot from a person."""
+
+    def __init__(self, policy, random):
+        self.policy = policy
+        self.random = random
+        self.framework = None
+        self.pressed = pygame.key.ScancodeWrapper((False,) * 512)
+
+    def wait(self, timeout):
+        pass
+
+    def poll(self):
+        # Nobody's there to make any events, but the queue still needs emptying
+        pygame.event.clear()
+
+        state = self.framework.state
+        keys = self.policy(state, self.random) if hasattr(state, "trash") else ()
+
+        pressed = [False] * 512
+        for key in keys:
+            pressed[SCANCODES[key]] = True
+        self.pressed = pygame.key.ScancodeWrapper(pressed)
+        return []
+
+    def get_pressed(self):
+        return self.pressed
+
+    def get_mouse_pos(self):
+        return (0, 0)
+
+    def get_mods(self):
+        return 0